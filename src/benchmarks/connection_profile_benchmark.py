@@ -0,0 +1,95 @@
+"""Compares the database connection profiles.
+
+For every profile this measures single-row inserts that commit each row, and
+a mixed load where one thread writes while another reads.
+
+Run with: PYTHONPATH=src python3 src/benchmarks/connection_profile_benchmark.py [seconds]
+"""
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from database_connection import PROFILES, connect, get_profile_pragmas
+from entities.pef_monitoring import BEFORE_MEDICATION, MORNING, PefMonitoring
+from initialize_database import migrate
+from repositories.pef_monitorin_repository import PefMonitoringRepository
+
+INSERT_COUNT = 1000
+SEED_ROWS = 20_000
+USER_COUNT = 20
+FIRST_DATE = datetime.date(2000, 1, 1)
+
+
+def measurement(i):
+    """Returns the i:th measurement. Every i gets its own user and date pair."""
+    date = FIRST_DATE + datetime.timedelta(days=i // USER_COUNT)
+    return PefMonitoring(f"user{i % USER_COUNT}", date.isoformat(),
+                         400, 410, 420, BEFORE_MEDICATION, MORNING)
+
+
+def time_inserts(database, pragmas):
+    repository = PefMonitoringRepository(connect(database, pragmas))
+    start = time.perf_counter()
+    for i in range(SEED_ROWS, SEED_ROWS + INSERT_COUNT):
+        repository.add_value(measurement(i))
+    return (time.perf_counter() - start) / INSERT_COUNT
+
+
+def run_mixed_load(database, pragmas, seconds):
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    stop = time.perf_counter() + seconds
+
+    def writer():
+        repository = PefMonitoringRepository(connect(database, pragmas))
+        i = SEED_ROWS + INSERT_COUNT
+        while time.perf_counter() < stop:
+            try:
+                repository.add_value(measurement(i))
+                counts["writes"] += 1
+            except sqlite3.OperationalError:
+                counts["locked"] += 1
+            i += 1
+
+    def reader():
+        repository = PefMonitoringRepository(connect(database, pragmas))
+        while time.perf_counter() < stop:
+            try:
+                repository.find_monitoring_by_username("user7")
+                counts["reads"] += 1
+            except sqlite3.OperationalError:
+                counts["locked"] += 1
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main(seconds):
+    for profile in PROFILES:
+        pragmas = get_profile_pragmas(profile, overrides={})
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "bench.sqlite")
+            setup = connect(database, pragmas)
+            migrate(setup)
+            PefMonitoringRepository(setup).add_values(
+                measurement(i) for i in range(SEED_ROWS))
+
+            insert_time = time_inserts(database, pragmas)
+            counts = run_mixed_load(database, pragmas, seconds)
+            setup.close()
+
+        print(f"{profile:>8}: add_value {insert_time * 1000:.3f} ms/row, "
+              f"mixed load {counts['writes'] / seconds:.0f} writes/s, "
+              f"{counts['reads'] / seconds:.0f} reads/s, "
+              f"{counts['locked']} locked errors")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
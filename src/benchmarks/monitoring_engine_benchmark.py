@@ -0,0 +1,56 @@
+"""Compares the Python and NumPy engines for summarizing many sessions.
+
+Run with: PYTHONPATH=src python3 src/benchmarks/monitoring_engine_benchmark.py [sessions]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from entities.pef_monitoring import AFTER_MEDICATION, BEFORE_MEDICATION, EVENING, MORNING
+from services import monitoring_engine
+from services.pef_service import PefService
+
+SESSION_DAYS = 14
+SLOTS = [(state, time_of_day)
+         for state in (BEFORE_MEDICATION, AFTER_MEDICATION)
+         for time_of_day in (MORNING, EVENING)]
+
+
+def generate_session():
+    rows = []
+    for offset in range(SESSION_DAYS):
+        day = (date(2025, 1, 1) + timedelta(days=offset)).isoformat()
+        for state, time_of_day in SLOTS:
+            value = random.randint(200, 600)
+            rows.append({"date": day, "value1": value, "value2": value + 5,
+                         "value3": value + 10, "state": state, "time": time_of_day})
+    return rows
+
+
+def main(session_count):
+    random.seed(1)
+    sessions = [generate_session() for _ in range(session_count)]
+    service = PefService()
+
+    start = time.perf_counter()
+    expected = [service._calculate_summary_data(pefs, SESSION_DAYS) for pefs in sessions]
+    python_time = time.perf_counter() - start
+    print(f"{session_count} sessions of {SESSION_DAYS} days")
+    print(f"{'python':>8}: {python_time * 1000:8.1f} ms")
+
+    if not monitoring_engine.is_available():
+        print(f"{'numpy':>8}: not installed")
+        return
+
+    # NumPy is imported on the first call, which is not part of the timing
+    monitoring_engine.summarize_sessions(sessions[:1])
+    start = time.perf_counter()
+    actual = monitoring_engine.summarize_sessions(sessions)
+    numpy_time = time.perf_counter() - start
+    print(f"{'numpy':>8}: {numpy_time * 1000:8.1f} ms "
+          f"({'same' if actual == expected else 'DIFFERENT'} results)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
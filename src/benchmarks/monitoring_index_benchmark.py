@@ -0,0 +1,110 @@
+"""Times the per-user monitoring queries before and after the schema 3 indexes.
+
+Run with: PYTHONPATH=src python3 src/benchmarks/monitoring_index_benchmark.py [rows]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from entities.pef_monitoring import AFTER_MEDICATION, BEFORE_MEDICATION, EVENING, MORNING
+from initialize_database import MIGRATIONS, migrate
+from repositories.pef_monitorin_repository import PefMonitoringRepository
+
+USER_COUNT = 2000
+QUERY_USERS = 50
+FIRST_DAY = date(2020, 1, 1)
+SLOTS = [(state, time_of_day)
+         for state in (BEFORE_MEDICATION, AFTER_MEDICATION)
+         for time_of_day in (MORNING, EVENING)]
+
+
+def generate_rows(row_count):
+    rows_per_user = row_count // USER_COUNT
+    for user in range(USER_COUNT):
+        for i in range(rows_per_user):
+            day = FIRST_DAY + timedelta(days=i // len(SLOTS))
+            state, time_of_day = SLOTS[i % len(SLOTS)]
+            value = random.randint(200, 600)
+            yield (f"user{user}", day.isoformat(), value, value + 5, value + 10,
+                   state, time_of_day)
+
+
+def create_fixture(file_path, row_count):
+    connection = sqlite3.connect(file_path)
+    connection.row_factory = sqlite3.Row
+    migrate(connection, MIGRATIONS[:2])
+    with connection:
+        connection.executemany("""
+            INSERT INTO Pef_monitoring
+            (username, date, value1, value2, value3, state, time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""", generate_rows(row_count))
+        connection.executemany("""
+            INSERT INTO MonitoringSession (username, start_date, end_date)
+            VALUES (?, ?, ?)""",
+            ((f"user{user}", (FIRST_DAY + timedelta(days=d)).isoformat(),
+              (FIRST_DAY + timedelta(days=d + 13)).isoformat())
+             for user in range(USER_COUNT) for d in range(0, 700, 14)))
+    return connection
+
+
+def time_queries(repository):
+    usernames = [f"user{user}" for user in random.sample(range(USER_COUNT), QUERY_USERS)]
+    queries = {
+        "find_monitoring_by_username":
+            lambda username: repository.find_monitoring_by_username(username),
+        "get_pef_entries_for_session":
+            lambda username: repository.get_pef_entries_for_session(
+                username, "2020-03-01", "2020-03-14"),
+        "get_sessions_by_username":
+            lambda username: repository.get_sessions_by_username(username),
+    }
+    timings = {}
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for username in usernames:
+            query(username)
+        timings[name] = (time.perf_counter() - start) / len(usernames)
+    return timings
+
+
+def query_plans(connection):
+    plans = {}
+    for name, sql in (
+            ("monitoring", "SELECT id, username, date, value1, value2, value3, state, time "
+                           "FROM Pef_monitoring WHERE username = 'user1' "
+                           "AND date BETWEEN '2020-03-01' AND '2020-03-14'"),
+            ("sessions", "SELECT id, username, start_date, end_date FROM MonitoringSession "
+                         "WHERE username = 'user1' ORDER BY start_date DESC")):
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        plans[name] = "; ".join(row["detail"] for row in rows)
+    return plans
+
+
+def main(row_count):
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as directory:
+        connection = create_fixture(os.path.join(directory, "bench.sqlite"), row_count)
+        repository = PefMonitoringRepository(connection)
+
+        before = time_queries(repository)
+        start = time.perf_counter()
+        migrate(connection)
+        index_time = time.perf_counter() - start
+        after = time_queries(repository)
+        plans = query_plans(connection)
+        connection.close()
+
+    print(f"{row_count} measurements, {USER_COUNT} users, "
+          f"indexes built in {index_time:.1f} s")
+    for name, elapsed in before.items():
+        print(f"{name:>28}: {elapsed * 1000:8.2f} ms -> {after[name] * 1000:6.2f} ms")
+    for name, plan in plans.items():
+        print(f"{name:>28}: {plan}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
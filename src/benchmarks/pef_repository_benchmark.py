@@ -0,0 +1,79 @@
+"""Compares per-row and bulk user resolution when reading reference PEFs.
+
+Run with: PYTHONPATH=src python3 src/benchmarks/pef_repository_benchmark.py [rows]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+from entities.pef import Pef
+from entities.user import User
+from initialize_database import migrate
+from repositories.pef_repository import PefRepository
+from repositories.user_repository import UserRepository
+
+USER_COUNT = 200
+
+
+def create_fixture(directory, row_count):
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    migrate(connection)
+
+    user_repository = UserRepository(connection)
+    for i in range(USER_COUNT):
+        user_repository.create(User(f"user{i}", "password"))
+
+    file_path = os.path.join(directory, "pef.csv")
+    with open(file_path, "w", encoding="utf-8") as file:
+        for i in range(row_count):
+            file.write(f"{uuid.uuid4()};{400 + i % 200}.0;user{i % USER_COUNT}\n")
+
+    return connection, user_repository, file_path
+
+
+def read_with_per_row_lookups(file_path, user_repository):
+    """The previous reader: one users query for every row in the file."""
+    pefs = []
+    with open(file_path, encoding="utf-8") as file:
+        for row in file:
+            row = row.strip()
+            if not row:
+                continue
+            pef_id, value, username = row.split(";")
+            user = user_repository.find_by_username(username) if username else None
+            pefs.append(Pef(value=float(value), user=user, pef_id=pef_id))
+    return pefs
+
+
+def measure(connection, read):
+    queries = []
+    connection.set_trace_callback(queries.append)
+    start = time.perf_counter()
+    pefs = read()
+    elapsed = time.perf_counter() - start
+    connection.set_trace_callback(None)
+    return len(pefs), len(queries), elapsed
+
+
+def main(row_count):
+    with tempfile.TemporaryDirectory() as directory:
+        connection, user_repository, file_path = create_fixture(directory, row_count)
+
+        results = {
+            "per-row lookups": measure(
+                connection, lambda: read_with_per_row_lookups(file_path, user_repository)),
+            "bulk lookup": measure(
+                connection, PefRepository(file_path, user_repository).find_all),
+        }
+
+    print(f"{row_count} references, {USER_COUNT} users")
+    for name, (pef_count, query_count, elapsed) in results.items():
+        print(f"{name:>16}: {pef_count} pefs, {query_count} queries, {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
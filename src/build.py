@@ -1,8 +1,11 @@
+from database_connection import get_database_connection
 from initialize_database import initialize_database
+from migrate_pef_file import migrate_pef_file
 
 
 def build():
     initialize_database()
+    migrate_pef_file(get_database_connection())
 
 
 if __name__ == "__main__":
@@ -13,3 +13,25 @@ PEF_FILE_PATH = os.path.join(dirname, "..", "data", PEF_FILENAME)
 
 DATABASE_FILENAME = os.getenv("DATABASE_FILENAME") or "database.sqlite"
 DATABASE_FILE_PATH = os.path.join(dirname, "..", "data", DATABASE_FILENAME)
+
+# SQLite performance profile, see database_connection.PROFILES. Single
+# settings can be overridden with SQLITE_<PRAGMA NAME>, e.g. SQLITE_CACHE_SIZE.
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE") or "wal"
+DATABASE_PRAGMA_OVERRIDES = {
+    name: os.getenv(f"SQLITE_{name.upper()}")
+    for name in ("journal_mode", "synchronous", "cache_size",
+                 "mmap_size", "temp_store", "busy_timeout")
+    if os.getenv(f"SQLITE_{name.upper()}")
+}
+
+# Maximum number of threads holding a database connection at the same time,
+# and how many seconds a thread waits for a free connection
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE") or 4)
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT") or 5)
+
+# Number of query results PefService keeps per process and how many seconds
+# a result stays valid
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE") or 64)
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL") or 30)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL") or "INFO"
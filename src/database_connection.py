@@ -1,9 +1,229 @@
+import logging
+import re
 import sqlite3
-from config import DATABASE_FILENAME
+import threading
+import time
+from config import (
+    DATABASE_FILENAME, DATABASE_PROFILE, DATABASE_PRAGMA_OVERRIDES,
+    DATABASE_POOL_SIZE, DATABASE_POOL_TIMEOUT
+)
 
-connection = sqlite3.connect(DATABASE_FILENAME)
-connection.row_factory = sqlite3.Row
+logger = logging.getLogger(__name__)
+
+# Named sets of PRAGMA settings. "default" keeps the SQLite defaults:
+# rollback journal and synchronous=FULL. "wal" lets readers and a writer
+# work at the same time and only syncs at checkpoints, which is still safe
+# against application crashes.
+PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+PRAGMA_NAMES = ("journal_mode", "synchronous", "cache_size",
+                "mmap_size", "temp_store", "busy_timeout")
+
+
+def get_profile_pragmas(profile=DATABASE_PROFILE, overrides=None):
+    """Returns the PRAGMA settings of a profile with overrides applied.
+
+    Args:
+        profile: Name of a profile in PROFILES.
+        overrides: Dictionary of single settings replacing the profile's values.
+
+    Raises:
+        ValueError: If the profile is unknown.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    pragmas = dict(PROFILES[profile])
+    pragmas.update(DATABASE_PRAGMA_OVERRIDES if overrides is None else overrides)
+    return pragmas
+
+
+def configure_connection(connection, pragmas):
+    """Applies PRAGMA settings to a connection.
+
+    Args:
+        connection: The database connection object.
+        pragmas: Dictionary of PRAGMA names and values.
+
+    Raises:
+        ValueError: If a name or value is not a plain word or number.
+
+    Returns:
+        Dictionary of the effective value of every setting in PRAGMA_NAMES.
+    """
+    for name, value in pragmas.items():
+        if name not in PRAGMA_NAMES or not re.fullmatch(r"-?\w+", str(value)):
+            raise ValueError(f"Invalid PRAGMA setting: {name}={value}")
+        connection.execute(f"PRAGMA {name} = {value}")
+
+    return {
+        name: connection.execute(f"PRAGMA {name}").fetchone()[0]
+        for name in PRAGMA_NAMES
+    }
+
+
+def connect(database=DATABASE_FILENAME, pragmas=None, check_same_thread=True):
+    """Opens a configured connection to a database.
+
+    Args:
+        database: Path to the database file.
+        pragmas: PRAGMA settings, defaults to the configured profile.
+        check_same_thread: If True, only the creating thread may use the connection.
+
+    Returns:
+        The database connection object.
+    """
+    new_connection = sqlite3.connect(database, check_same_thread=check_same_thread)
+    new_connection.row_factory = sqlite3.Row
+    effective = configure_connection(
+        new_connection, get_profile_pragmas() if pragmas is None else pragmas)
+    logger.info("Opened %s with %s", database, effective)
+    return new_connection
+
+
+class ConnectionPoolExhaustedError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Hands out one database connection per thread.
+
+    A thread keeps its connection until release() is called, so repositories
+    can fetch it on every call. At most max_size connections are open at a
+    time; a thread asking for one more waits until another thread releases
+    its connection or exits.
+    """
+
+    def __init__(self, database=DATABASE_FILENAME, max_size=DATABASE_POOL_SIZE,
+                 timeout=DATABASE_POOL_TIMEOUT, health_check_interval=30.0):
+        """Initializes an empty pool.
+
+        Args:
+            database: Path to the database file.
+            max_size: Maximum number of open connections.
+            timeout: Seconds to wait for a free connection slot.
+            health_check_interval: Seconds after which a connection is
+                checked again before it is handed out.
+        """
+        self._database = database
+        self._timeout = timeout
+        self._health_check_interval = health_check_interval
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = {}
+
+    @property
+    def size(self):
+        """Number of open connections."""
+        return len(self._connections)
+
+    def get_connection(self):
+        """Returns the calling thread's connection, opening one if needed.
+
+        Raises:
+            ConnectionPoolExhaustedError: If no connection slot becomes free in time.
+        """
+        connection = self._current_connection()
+        if connection is not None:
+            return connection
+
+        self._acquire_slot()
+        try:
+            connection = connect(self._database, check_same_thread=False)
+        except sqlite3.Error:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._connections[threading.current_thread()] = connection
+        self._local.connection = connection
+        self._local.checked_at = time.monotonic()
+        return connection
+
+    def _current_connection(self):
+        """Returns the calling thread's connection if it is still usable."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return None
+        if time.monotonic() - self._local.checked_at < self._health_check_interval:
+            return connection
+        if self._is_healthy(connection):
+            self._local.checked_at = time.monotonic()
+            return connection
+        logger.warning("Replacing a broken connection to %s", self._database)
+        self.release()
+        return None
+
+    def _acquire_slot(self):
+        """Takes a connection slot, which is freed by release().
+
+        Raises:
+            ConnectionPoolExhaustedError: If no slot becomes free in time.
+        """
+        # The slot is held for as long as the thread keeps its connection,
+        # so it cannot be released by a with block here
+        # pylint: disable=consider-using-with
+        if self._slots.acquire(blocking=False):
+            return
+        self._close_connections_of_dead_threads()
+        if not self._slots.acquire(timeout=self._timeout):
+            raise ConnectionPoolExhaustedError(
+                f"No free database connection after {self._timeout} s")
+
+    def release(self):
+        """Closes the calling thread's connection and frees its slot."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        self._local.connection = None
+        with self._lock:
+            self._connections.pop(threading.current_thread(), None)
+        self._close(connection)
+
+    def close_all(self):
+        """Closes every connection of the pool."""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            self._close(connection)
+        self._local = threading.local()
+
+    def _close_connections_of_dead_threads(self):
+        """Frees the slots of threads that exited without releasing them."""
+        with self._lock:
+            dead = [thread for thread in self._connections if not thread.is_alive()]
+            connections = [self._connections.pop(thread) for thread in dead]
+        for connection in connections:
+            self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+        self._slots.release()
+
+    def _is_healthy(self, connection):
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+
+connection_pool = ConnectionPool()
 
 
 def get_database_connection():
-    return connection
+    """Returns the database connection of the calling thread."""
+    return connection_pool.get_connection()
@@ -4,17 +4,19 @@ import uuid
 class Pef:
     """Class representing a PEF reference."""
 
-    def __init__(self, value, user=None, pef_id=None):
+    def __init__(self, value, user=None, pef_id=None, created_at=None):
         """Constructor for the Pef class.
 
         Args:
             value (float): The PEF reference value.
             user (User): The user who owns this reference.
             pef_id (str): The ID for the reference, defaults to a generated UUID.
+            created_at (str): ISO timestamp of when the reference was stored.
         """
         self.value = value
         self.user = user
         self.pef_id = pef_id or str(uuid.uuid4())
+        self.created_at = created_at
 
     def __format__(self, format_spec):
         return format(self.value, format_spec)
@@ -1,3 +1,10 @@
+# Medication states and times of day of a measurement, as stored by the UI
+BEFORE_MEDICATION = "ENNEN LÄÄKETTÄ"
+AFTER_MEDICATION = "LÄÄKKEEN JÄLKEEN"
+MORNING = "AAMU"
+EVENING = "ILTA"
+
+
 class PefMonitoring:
     """Represents a PEF monitoring data record.
 
@@ -7,8 +14,8 @@ class PefMonitoring:
         value1: The first measurement value.
         value2: The second measurement value.
         value3: The third measurement value.
-        state: The state or status of the monitoring.
-        time: The time of the monitoring entry.
+        state: The medication state, BEFORE_MEDICATION or AFTER_MEDICATION.
+        time: The time of day, MORNING or EVENING.
     """
 
     def __init__(self, username, date, value1, value2, value3, state, time):
@@ -1,8 +1,12 @@
+import logging
 from tkinter import Tk
+from config import LOG_LEVEL
 from ui.ui import UI
 
 
 def main():
+    logging.basicConfig(level=LOG_LEVEL)
+
     window = Tk()
     window.title("Pef-laskuri")
 
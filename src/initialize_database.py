@@ -1,4 +1,250 @@
+import sqlite3
+import sys
 from database_connection import get_database_connection
+from entities.pef_monitoring import AFTER_MEDICATION, BEFORE_MEDICATION, EVENING, MORNING
+
+# Daily values of pef_daily computed from the measurements of a day
+DAILY_AGGREGATES = f"""
+                max(case when state = '{BEFORE_MEDICATION}' and time = '{MORNING}'
+                    then max(value1, value2, value3) end),
+                max(case when state = '{AFTER_MEDICATION}' and time = '{MORNING}'
+                    then max(value1, value2, value3) end),
+                max(case when state = '{BEFORE_MEDICATION}' and time = '{EVENING}'
+                    then max(value1, value2, value3) end),
+                max(case when state = '{AFTER_MEDICATION}' and time = '{EVENING}'
+                    then max(value1, value2, value3) end),
+                max(max(value1, value2, value3)),
+                min(max(value1, value2, value3)),
+                sum(max(value1, value2, value3)),
+                count(*)"""
+
+# Trigger statements recomputing the pef_daily row of the day of the "new"
+# or "old" measurement. A day without measurements has no row.
+DAILY_REFRESH = """
+            delete from pef_daily where username = {row}.username and date = {row}.date;
+            insert into pef_daily
+            select username, date,""" + DAILY_AGGREGATES + """
+            from Pef_monitoring
+            where username = {row}.username and date = {row}.date
+            group by username, date;"""
+
+# Triggers keeping pef_daily up to date, and the statement filling it
+DAILY_TRIGGERS = [
+    f"""
+    create trigger if not exists pef_monitoring_insert_daily
+    after insert on Pef_monitoring
+    begin{DAILY_REFRESH.format(row="new")}
+    end;
+    """,
+    f"""
+    create trigger if not exists pef_monitoring_update_daily
+    after update on Pef_monitoring
+    begin{DAILY_REFRESH.format(row="old")}{DAILY_REFRESH.format(row="new")}
+    end;
+    """,
+    f"""
+    create trigger if not exists pef_monitoring_delete_daily
+    after delete on Pef_monitoring
+    begin{DAILY_REFRESH.format(row="old")}
+    end;
+    """,
+]
+DAILY_FILL = f"""
+    insert into pef_daily
+    select username, date,{DAILY_AGGREGATES}
+    from Pef_monitoring
+    group by username, date;
+    """
+
+# Schema migrations, applied in order. The position of a step in the list is
+# the schema version it upgrades to, stored in PRAGMA user_version. Steps are
+# only ever appended: never edit a step that has been released.
+#
+# Keep steps additive (create table/index, alter table ... add column) so that
+# an existing database is upgraded in place. SQLite adds a column by
+# rewriting only the schema, and builds a new index from the existing rows,
+# so neither rewrites the table data.
+MIGRATIONS = [
+    # 1: initial schema
+    [
+        """
+        create table if not exists users (
+            username text primary key,
+            password text
+        );
+        """,
+        """
+        create table if not exists Pef_monitoring (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username text,
+            date date,
+            value1 integer,
+            value2 integer,
+            value3 integer,
+            state text,
+            time text
+        );
+        """,
+        """
+        create table if not exists MonitoringSession (
+            id INTEGER PRIMARY KEY,
+            username TEXT,
+            start_date TEXT,
+            end_date TEXT
+        );
+        """,
+    ],
+    # 2: reference PEFs moved from pef.csv to the database
+    [
+        """
+        create table if not exists pef_reference (
+            pef_id text primary key,
+            username text,
+            value real,
+            created_at text
+        );
+        """,
+        """
+        create index if not exists idx_pef_reference_username_created_at
+        on pef_reference (username, created_at);
+        """,
+    ],
+    # 3: per-user lookups; both indexes contain every selected column
+    [
+        """
+        create index if not exists idx_pef_monitoring_username_date
+        on Pef_monitoring (username, date, state, time, value1, value2, value3);
+        """,
+        """
+        create index if not exists idx_monitoring_session_username_start_date
+        on MonitoringSession (username, start_date, end_date);
+        """,
+    ],
+    # 4: one measurement per user, date, medication state and time of day.
+    # Earlier duplicates were rejected by the UI, so the first one is kept.
+    [
+        """
+        delete from Pef_monitoring
+        where id not in (
+            select min(id) from Pef_monitoring
+            group by username, date, state, time
+        );
+        """,
+        """
+        create unique index if not exists idx_pef_monitoring_measurement
+        on Pef_monitoring (username, date, state, time);
+        """,
+    ],
+    # 5: stored session summaries. summary_version is the rule set the summary
+    # was computed with, and the triggers clear it whenever a measurement
+    # inside the session changes.
+    [
+        "alter table MonitoringSession add column over_20 integer;",
+        "alter table MonitoringSession add column over_15 integer;",
+        "alter table MonitoringSession add column highest numeric;",
+        "alter table MonitoringSession add column lowest numeric;",
+        "alter table MonitoringSession add column average real;",
+        "alter table MonitoringSession add column warning_message text;",
+        "alter table MonitoringSession add column summary_version integer;",
+        """
+        create trigger if not exists pef_monitoring_insert_session_summary
+        after insert on Pef_monitoring
+        begin
+            update MonitoringSession set summary_version = null
+            where username = new.username and new.date between start_date and end_date;
+        end;
+        """,
+        """
+        create trigger if not exists pef_monitoring_update_session_summary
+        after update on Pef_monitoring
+        begin
+            update MonitoringSession set summary_version = null
+            where (username = old.username and old.date between start_date and end_date)
+            or (username = new.username and new.date between start_date and end_date);
+        end;
+        """,
+        """
+        create trigger if not exists pef_monitoring_delete_session_summary
+        after delete on Pef_monitoring
+        begin
+            update MonitoringSession set summary_version = null
+            where username = old.username and old.date between start_date and end_date;
+        end;
+        """,
+    ],
+    # 6: daily maxima per time slot, kept up to date by triggers. A trigger
+    # recomputes only the day of the changed measurement, which has at most
+    # one row per slot.
+    [
+        """
+        create table if not exists pef_daily (
+            username text,
+            date text,
+            max_m integer,
+            max_m_p integer,
+            max_e integer,
+            max_e_p integer,
+            highest integer,
+            lowest integer,
+            total integer,
+            row_count integer,
+            primary key (username, date)
+        ) without rowid;
+        """,
+        *DAILY_TRIGGERS,
+        DAILY_FILL,
+    ],
+    # 7: the daily slots of version 6 compared state and time with English
+    # names, but the UI stores the Finnish ones, so the slot maxima were
+    # always empty. Recreate the triggers and refill the table.
+    [
+        "drop trigger if exists pef_monitoring_insert_daily;",
+        "drop trigger if exists pef_monitoring_update_daily;",
+        "drop trigger if exists pef_monitoring_delete_daily;",
+        *DAILY_TRIGGERS,
+        "delete from pef_daily;",
+        DAILY_FILL,
+    ],
+]
+
+
+def get_schema_version(connection):
+    """Returns the schema version of the database."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection, migrations=None):
+    """Upgrades the database schema to the latest version.
+
+    Each pending step runs in its own transaction together with the version
+    bump, so a failing step leaves the database at the previous version.
+
+    Args:
+        connection: The database connection object.
+        migrations: List of migration steps, defaults to MIGRATIONS.
+
+    Returns:
+        The schema version after the upgrade.
+    """
+    if migrations is None:
+        migrations = MIGRATIONS
+
+    version = get_schema_version(connection)
+    cursor = connection.cursor()
+
+    for target_version in range(version + 1, len(migrations) + 1):
+        cursor.execute("BEGIN")
+        try:
+            for statement in migrations[target_version - 1]:
+                cursor.execute(statement)
+            cursor.execute(f"PRAGMA user_version = {target_version}")
+            connection.commit()
+        except sqlite3.Error:
+            connection.rollback()
+            raise
+        version = target_version
+
+    return version
 
 
 def drop_tables(connection):
@@ -14,52 +260,28 @@ def drop_tables(connection):
     cursor.execute("""
         drop table if exists MonitoringSession
     """)
-    connection.commit()
-
-
-def create_tables(connection):
-
-    cursor = connection.cursor()
-
-    # Create users table
     cursor.execute("""
-            create table users (
-                username text primary key,
-                password text
-            );
-        """)
-
-    # Create Pef_monitoring table with corrected syntax
-    cursor.execute("""
-            create table Pef_monitoring (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username text,
-                date date,
-                value1 integer,
-                value2 integer,
-                value3 integer,
-                state text,
-                time text
-            );
-        """)
+        drop table if exists pef_reference
+    """)
     cursor.execute("""
-            create table MonitoringSession (
-            id INTEGER PRIMARY KEY,
-            username TEXT,
-            start_date TEXT,
-            end_date TEXT
-        );
-        """)
+        drop table if exists pef_daily
+    """)
+    cursor.execute("PRAGMA user_version = 0")
     connection.commit()
 
 
-def initialize_database():
+def initialize_database(reset=False):
+    """Creates or upgrades the database.
 
+    Args:
+        reset: If True, all tables are dropped before the schema is created.
+    """
     connection = get_database_connection()
 
-    drop_tables(connection)
-    create_tables(connection)
+    if reset:
+        drop_tables(connection)
+    migrate(connection)
 
 
 if __name__ == "__main__":
-    initialize_database()
+    initialize_database(reset="--reset" in sys.argv)
@@ -0,0 +1,62 @@
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from database_connection import get_database_connection
+from initialize_database import migrate
+from repositories.pef_repository import read_rows
+from config import PEF_FILE_PATH
+
+BATCH_SIZE = 1000
+
+# The file has no timestamps. Each reference gets this time plus its line
+# number in microseconds, which keeps the order of the file and sorts the
+# migrated references before any reference created in the application.
+FILE_EPOCH = datetime(1970, 1, 1)
+
+
+def _read_rows(file_path):
+    """Yields (pef_id, username, value, created_at) tuples from a reference file."""
+    for line_number, pef_id, value, username in read_rows(file_path):
+        created_at = FILE_EPOCH + timedelta(microseconds=line_number)
+        yield pef_id, username, value, created_at.isoformat(timespec="microseconds")
+
+
+def migrate_pef_file(connection, file_path=PEF_FILE_PATH, batch_size=BATCH_SIZE):
+    """Imports reference PEFs from a pef.csv file into the pef_reference table.
+
+    The schema is upgraded first. The file is streamed and inserted in
+    batches, each batch in its own transaction. References that already
+    exist are skipped, so the import can be run on every build and an
+    interrupted migration can simply be run again.
+
+    Args:
+        connection: The database connection object.
+        file_path: Path to the reference file.
+        batch_size: Number of rows inserted per transaction.
+
+    Returns:
+        Number of references imported.
+    """
+    migrate(connection)
+    if not os.path.exists(file_path):
+        return 0
+
+    rows = _read_rows(file_path)
+    imported = 0
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        with connection:
+            cursor = connection.executemany("""
+                INSERT OR IGNORE INTO pef_reference (pef_id, username, value, created_at)
+                VALUES (?, ?, ?, ?)""", batch)
+        imported += cursor.rowcount
+
+    return imported
+
+
+if __name__ == "__main__":
+    count = migrate_pef_file(get_database_connection())
+    print(f"Imported {count} reference PEFs from {PEF_FILE_PATH}")
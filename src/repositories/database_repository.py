@@ -0,0 +1,21 @@
+from database_connection import get_database_connection
+
+
+class DatabaseRepository:
+    """Base class for repositories that store data in the SQLite database."""
+
+    def __init__(self, connection=None):
+        """Initializes the repository with a database connection.
+
+        Args:
+            connection: The database connection object. If None, every call
+                uses the connection of the calling thread from the pool.
+        """
+        self._fixed_connection = connection
+
+    @property
+    def _connection(self):
+        """The connection used for the current call."""
+        if self._fixed_connection is not None:
+            return self._fixed_connection
+        return get_database_connection()
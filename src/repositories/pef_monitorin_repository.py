@@ -1,17 +1,65 @@
 from entities.pef_monitoring import PefMonitoring
-from database_connection import get_database_connection
+from repositories.database_repository import DatabaseRepository
 
+# Explicit column lists keep the reads answerable from the covering indexes
+MONITORING_COLUMNS = "id, username, date, value1, value2, value3, state, time"
+SESSION_COLUMNS = "id, username, start_date, end_date"
+DAILY_COLUMNS = ("date, max_m, max_m_p, max_e, max_e_p, "
+                 "highest, lowest, total, row_count")
+# Measurements of a username that are not inside a finished session. The
+# unary + drops the date affinity of Pef_monitoring.date, so the session index
+# is searched by start date and not only by username.
+UNFINISHED_CONDITION = """username = ? AND NOT EXISTS (
+                SELECT 1 FROM MonitoringSession AS session
+                WHERE session.username = monitoring.username
+                AND session.start_date <= +monitoring.date
+                AND session.end_date >= +monitoring.date
+            )"""
+SUMMARY_COLUMNS = "over_20, over_15, highest, lowest, average, warning_message"
 
-class PefMonitoringRepository:
-    """Repository class for managing PEF monitoring data in the database."""
+BULK_BATCH_SIZE = 500
+PAGE_SIZE = 50
 
-    def __init__(self, connection):
-        """Initializes the repository with a database connection.
+# How add_value handles a record that has the same username, date, state and
+# time as an existing one
+CONFLICT_CLAUSES = {
+    None: "",
+    "ignore": "ON CONFLICT (username, date, state, time) DO NOTHING",
+    "replace": """ON CONFLICT (username, date, state, time) DO UPDATE SET
+            value1 = excluded.value1,
+            value2 = excluded.value2,
+            value3 = excluded.value3""",
+}
 
-        Args:
-            connection: The database connection object.
-        """
-        self._connection = connection
+
+def get_insert_parameters(pef_monitoring):
+    """Converts a monitoring record into insert parameters.
+
+    Args:
+        pef_monitoring: The PefMonitoring object to convert.
+
+    Returns:
+        Tuple of column values, or None if the record is incomplete or its
+        values are not integers.
+    """
+    try:
+        values = [int(value) for value in (
+            pef_monitoring.value1, pef_monitoring.value2, pef_monitoring.value3)]
+    except (TypeError, ValueError):
+        return None
+
+    if not all([pef_monitoring.username, pef_monitoring.date,
+                pef_monitoring.state, pef_monitoring.time]):
+        return None
+
+    return (pef_monitoring.username, str(pef_monitoring.date), *values,
+            pef_monitoring.state, pef_monitoring.time)
+
+
+# All monitoring and session queries live in this one repository, so the
+# paged and aggregated reads add to its public methods
+class PefMonitoringRepository(DatabaseRepository):  # pylint: disable=too-many-public-methods
+    """Repository class for managing PEF monitoring data in the database."""
 
     def find_monitoring_by_username(self, username):
         """Retrieves all monitoring records for a specific username.
@@ -23,13 +71,130 @@ class PefMonitoringRepository:
             List of rows matching the username.
         """
         cursor = self._connection.cursor()
-        cursor.execute("""
-            SELECT * FROM Pef_monitoring
+        cursor.execute(f"""
+            SELECT {MONITORING_COLUMNS} FROM Pef_monitoring
             WHERE username = ?""",
                        (username,))
         rows = cursor.fetchall()
         return rows
 
+    def iter_monitoring_by_username(self, username, since=None, limit=None):
+        """Yields the monitoring records of a username in date and time order.
+
+        Rows are sorted by the database and read from the cursor one at a
+        time, so the full history is never held in memory.
+
+        Args:
+            username: The username to filter records.
+            since: Optional first date to include.
+            limit: Optional maximum number of rows.
+
+        Yields:
+            Rows ordered by date, time and insertion order.
+        """
+        query = f"SELECT {MONITORING_COLUMNS} FROM Pef_monitoring WHERE username = ?"
+        parameters = [username]
+        if since is not None:
+            query += " AND date >= ?"
+            parameters.append(str(since))
+        query += " ORDER BY date, time, id"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        cursor = self._connection.cursor()
+        cursor.execute(query, parameters)
+        yield from cursor
+
+    def find_unfinished_monitoring(self, username):
+        """Retrieves the monitoring records not covered by a finished session.
+
+        Args:
+            username: The username to filter records.
+
+        Returns:
+            List of rows ordered by date, time and insertion order.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute(f"""
+            SELECT {MONITORING_COLUMNS} FROM Pef_monitoring AS monitoring
+            WHERE {UNFINISHED_CONDITION}
+            ORDER BY date, time, id""",
+                       (username,))
+        return cursor.fetchall()
+
+    def find_unfinished_monitoring_page(self, username, after=None, page_size=PAGE_SIZE):
+        """Retrieves one page of the records not covered by a finished session.
+
+        Args:
+            username: The username to filter records.
+            after: (date, time, id) of the last row of the previous page, or
+                None for the first page.
+            page_size: Maximum number of rows.
+
+        Returns:
+            List of rows ordered by date, time and insertion order.
+        """
+        query = (f"SELECT {MONITORING_COLUMNS} FROM Pef_monitoring AS monitoring "
+                 f"WHERE {UNFINISHED_CONDITION}")
+        parameters = [username]
+        if after is not None:
+            query += " AND (date, time, id) > (?, ?, ?)"
+            parameters += list(after)
+        query += " ORDER BY date, time, id LIMIT ?"
+        parameters.append(page_size)
+
+        cursor = self._connection.cursor()
+        cursor.execute(query, parameters)
+        return cursor.fetchall()
+
+    def get_unfinished_monitoring_span(self, username):
+        """Counts the records not covered by a finished session.
+
+        Args:
+            username: The username to filter records.
+
+        Returns:
+            Row with row_count, first_date and last_date; the dates are None
+            when there are no such records.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute(f"""
+            SELECT COUNT(*) AS row_count, MIN(date) AS first_date, MAX(date) AS last_date
+            FROM Pef_monitoring AS monitoring
+            WHERE {UNFINISHED_CONDITION}""",
+                       (username,))
+        return cursor.fetchone()
+
+    def find_monitoring_page(self, username, after=None, page_size=PAGE_SIZE):
+        """Retrieves one page of a user's monitoring records.
+
+        Pages are ordered by date and id. The next page starts after the
+        last row of the previous one, so every page costs the same no matter
+        how far into the history it is.
+
+        Args:
+            username: The username to filter records.
+            after: (date, id) of the last row of the previous page, or None
+                for the first page.
+            page_size: Maximum number of rows.
+
+        Returns:
+            List of rows.
+        """
+        query = f"SELECT {MONITORING_COLUMNS} FROM Pef_monitoring WHERE username = ?"
+        parameters = [username]
+        if after is not None:
+            after_date, after_id = after
+            query += " AND date >= ? AND (date > ? OR id > ?)"
+            parameters += [after_date, after_date, after_id]
+        query += " ORDER BY date, id LIMIT ?"
+        parameters.append(page_size)
+
+        cursor = self._connection.cursor()
+        cursor.execute(query, parameters)
+        return cursor.fetchall()
+
     def order_by_date(self, rows):
         """Sorts monitoring records by date in ascending order.
 
@@ -41,22 +206,77 @@ class PefMonitoringRepository:
         """
         return sorted(rows, key=lambda x: x[2])  # assuming date is at index 2
 
-    def add_value(self, pef_monitoring: PefMonitoring):
+    def add_value(self, pef_monitoring: PefMonitoring, on_conflict=None):
         """Inserts a new monitoring record into the database.
 
+        A record conflicts with an existing one when the username, date,
+        state and time are the same.
+
         Args:
             pef_monitoring: The PefMonitoring object to add.
+            on_conflict: None to raise sqlite3.IntegrityError on a conflict,
+                "ignore" to keep the existing record or "replace" to
+                overwrite its values.
+
+        Returns:
+            The id of the stored record, or None if it was ignored.
         """
         cursor = self._connection.cursor()
-        cursor.execute("""
+        cursor.execute(f"""
             INSERT INTO Pef_monitoring
             (username, date, value1, value2, value3, state, time)
-            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            {CONFLICT_CLAUSES[on_conflict]}
+            RETURNING id""",
                        (pef_monitoring.username, pef_monitoring.date,
                         pef_monitoring.value1, pef_monitoring.value2,
                         pef_monitoring.value3, pef_monitoring.state,
                         pef_monitoring.time))
+        row = cursor.fetchone()
         self._connection.commit()
+        return row["id"] if row else None
+
+    def add_values(self, pef_monitorings, batch_size=BULK_BATCH_SIZE):
+        """Inserts many monitoring records, committing once per batch.
+
+        Args:
+            pef_monitorings: Iterable of PefMonitoring objects to add.
+            batch_size: Number of records inserted per transaction.
+
+        Returns:
+            Dictionary with the numbers of inserted and rejected records.
+            Incomplete records and duplicates count as rejected.
+        """
+        counts = {"inserted": 0, "rejected": 0}
+        batch = []
+
+        for pef_monitoring in pef_monitorings:
+            parameters = get_insert_parameters(pef_monitoring)
+            if parameters is None:
+                counts["rejected"] += 1
+                continue
+            batch.append(parameters)
+            if len(batch) >= batch_size:
+                self._insert_batch(batch, counts)
+                batch = []
+
+        if batch:
+            self._insert_batch(batch, counts)
+        return counts
+
+    def _insert_batch(self, batch, counts):
+        """Inserts a batch of parameter tuples in one transaction.
+
+        Duplicates of existing records are skipped and counted as rejected.
+        """
+        with self._connection:
+            cursor = self._connection.executemany(f"""
+                INSERT INTO Pef_monitoring
+                (username, date, value1, value2, value3, state, time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                {CONFLICT_CLAUSES["ignore"]}""", batch)
+        counts["inserted"] += cursor.rowcount
+        counts["rejected"] += len(batch) - cursor.rowcount
 
     def delete_all_monitoring(self):
         """Deletes all monitoring data from the database."""
@@ -64,6 +284,12 @@ class PefMonitoringRepository:
         cursor.execute("DELETE FROM Pef_monitoring")
         self._connection.commit()
 
+    def delete_all_sessions(self):
+        """Deletes all monitoring sessions from the database."""
+        cursor = self._connection.cursor()
+        cursor.execute("DELETE FROM MonitoringSession")
+        self._connection.commit()
+
     def create_monitoring_session(self, username, start_date, end_date):
         """Creates a new monitoring session for a user.
 
@@ -89,13 +315,171 @@ class PefMonitoringRepository:
             List of session records.
         """
         cursor = self._connection.cursor()
-        cursor.execute("""
-            SELECT * FROM MonitoringSession
+        cursor.execute(f"""
+            SELECT {SESSION_COLUMNS} FROM MonitoringSession
             WHERE username = ?
             ORDER BY start_date DESC""",
                        (username,))
         return cursor.fetchall()
 
+    def count_sessions(self, username):
+        """Returns the number of monitoring sessions of a username."""
+        cursor = self._connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM MonitoringSession WHERE username = ?",
+                       (username,))
+        return cursor.fetchone()[0]
+
+    def get_sessions_page(self, username, after=None, page_size=PAGE_SIZE):
+        """Retrieves one page of a user's monitoring sessions, newest first.
+
+        Args:
+            username: The username to filter sessions.
+            after: (start_date, id) of the last session of the previous page,
+                or None for the first page.
+            page_size: Maximum number of sessions.
+
+        Returns:
+            List of session records.
+        """
+        query = f"SELECT {SESSION_COLUMNS} FROM MonitoringSession WHERE username = ?"
+        parameters = [username]
+        if after is not None:
+            after_date, after_id = after
+            query += " AND start_date <= ? AND (start_date < ? OR id < ?)"
+            parameters += [after_date, after_date, after_id]
+        query += " ORDER BY start_date DESC, id DESC LIMIT ?"
+        parameters.append(page_size)
+
+        cursor = self._connection.cursor()
+        cursor.execute(query, parameters)
+        return cursor.fetchall()
+
+    def get_stored_session_summary(self, username, start_date, end_date):
+        """Retrieves the summary stored for a session.
+
+        Args:
+            username: The username associated with the session.
+            start_date: The start date of the session.
+            end_date: The end date of the session.
+
+        Returns:
+            Row with the summary columns and summary_version, or None if there
+            is no such session. summary_version is None when the summary has
+            not been stored or a measurement of the session has changed.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute(f"""
+            SELECT {SUMMARY_COLUMNS}, summary_version FROM MonitoringSession
+            WHERE username = ? AND start_date = ? AND end_date = ?
+            ORDER BY id LIMIT 1""",
+                       (username, start_date, end_date))
+        return cursor.fetchone()
+
+    def store_session_summary(self, username, start_date, end_date, summary, version):
+        """Stores the summary of the sessions with the given dates.
+
+        Args:
+            username: The username associated with the session.
+            start_date: The start date of the session.
+            end_date: The end date of the session.
+            summary: Dictionary with over_20, over_15, highest, lowest,
+                average and warning_message.
+            version: Version of the rules the summary was computed with.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("""
+            UPDATE MonitoringSession
+            SET over_20 = ?, over_15 = ?, highest = ?, lowest = ?, average = ?,
+                warning_message = ?, summary_version = ?
+            WHERE username = ? AND start_date = ? AND end_date = ?""",
+                       (summary["over_20"], summary["over_15"], summary["highest"],
+                        summary["lowest"], summary["average"], summary["warning_message"],
+                        version, username, start_date, end_date))
+        self._connection.commit()
+
+    def get_daily_values(self, username, start_date, end_date):
+        """Retrieves the daily maxima of a user from the pef_daily table.
+
+        Args:
+            username: The username associated with entries.
+            start_date: The start date for filtering.
+            end_date: The end date for filtering.
+
+        Returns:
+            List of rows with date, max_m, max_m_p, max_e, max_e_p, highest,
+            lowest, total and row_count, ordered by date.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute(f"""
+            SELECT {DAILY_COLUMNS} FROM pef_daily
+            WHERE username = ? AND date BETWEEN ? AND ?
+            ORDER BY date""",
+                       (username, start_date, end_date))
+        return cursor.fetchall()
+
+    def count_measurements_by_date(self, username, start_date, end_date):
+        """Counts a user's measurements per day from the pef_daily table.
+
+        Args:
+            username: The username associated with entries.
+            start_date: The start date for filtering.
+            end_date: The end date for filtering.
+
+        Returns:
+            Dictionary of measurement counts by date. Days without
+            measurements are left out.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("""
+            SELECT date, row_count FROM pef_daily
+            WHERE username = ? AND date BETWEEN ? AND ?""",
+                       (username, start_date, end_date))
+        return dict(cursor.fetchall())
+
+    def get_session_summary_data(self, username, start_date, end_date):
+        """Computes the monitoring summary figures for a date range in one query.
+
+        Mirrors PefService.calculate_monitoring_difference, reading one
+        pef_daily row per day instead of the measurements. A day counts
+        towards over_20 when the morning and evening values before medication
+        differ by at least 20 % and 60 L/min, and towards over_15 once for
+        each time of day whose value after medication is at least 15 % higher.
+
+        Args:
+            username: The username associated with entries.
+            start_date: The start date for filtering.
+            end_date: The end date for filtering.
+
+        Returns:
+            Dictionary with over_20, over_15, monitored_days_count, highest,
+            lowest and average.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("""
+            SELECT
+                COUNT(*) AS monitored_days_count,
+                TOTAL(CASE WHEN ABS(max_m - max_e) * 1.0 / MAX(max_m, max_e) * 100 >= 20
+                           AND ABS(max_m - max_e) >= 60 THEN 1 ELSE 0 END) AS over_20,
+                TOTAL((CASE WHEN (max_m_p - max_m) * 1.0 / max_m * 100 >= 15
+                            THEN 1 ELSE 0 END)
+                      + (CASE WHEN (max_e_p - max_e) * 1.0 / max_e * 100 >= 15
+                              THEN 1 ELSE 0 END)) AS over_15,
+                MAX(highest) AS highest,
+                MIN(lowest) AS lowest,
+                SUM(total) * 1.0 / SUM(row_count) AS average
+            FROM pef_daily
+            WHERE username = ? AND date BETWEEN ? AND ?""",
+                       (username, start_date, end_date))
+        row = cursor.fetchone()
+        return {
+            "over_20": int(row["over_20"]),
+            "over_15": int(row["over_15"]),
+            "monitored_days_count": row["monitored_days_count"],
+            "highest": row["highest"],
+            "lowest": row["lowest"],
+            "average": row["average"],
+        }
+
     def get_pef_entries_for_session(self, username, start_date, end_date):
         """Retrieves PEF entries within a date range for a user.
 
@@ -108,11 +492,11 @@ class PefMonitoringRepository:
             List of matching PEF records.
         """
         cursor = self._connection.cursor()
-        cursor.execute("""
-            SELECT * FROM Pef_monitoring
+        cursor.execute(f"""
+            SELECT {MONITORING_COLUMNS} FROM Pef_monitoring
             WHERE username = ? AND date BETWEEN ? AND ?""",
                        (username, start_date, end_date))
         return cursor.fetchall()
 
 
-pef_monitoring_repository = PefMonitoringRepository(get_database_connection())
+pef_monitoring_repository = PefMonitoringRepository()
@@ -0,0 +1,106 @@
+from datetime import datetime
+from entities.pef import Pef
+from entities.user import User
+from repositories.database_repository import DatabaseRepository
+
+
+def get_pef_by_row(row):
+    """Creates a Pef object from a pef_reference row joined with its owner.
+
+    Args:
+        row: A database row with the reference columns and the owner's password.
+
+    Returns:
+        A Pef object.
+    """
+    user = User(row["username"], row["password"]) if row["password"] is not None else None
+    return Pef(
+        value=row["value"],
+        user=user,
+        pef_id=row["pef_id"],
+        created_at=row["created_at"]
+    )
+
+
+class PefReferenceRepository(DatabaseRepository):
+    """Repository for managing PEF references stored in the database.
+
+    Lookups by user are served by the (username, created_at) index and the
+    owners are joined in the same query.
+    """
+
+    def find_all(self):
+        """Retrieves all PEF references.
+
+        Returns:
+            List of Pef objects in the order they were created.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("""
+            SELECT r.pef_id, r.value, r.username, r.created_at, u.password
+            FROM pef_reference r
+            LEFT JOIN users u ON u.username = r.username
+            ORDER BY r.created_at, r.rowid""")
+        return list(map(get_pef_by_row, cursor.fetchall()))
+
+    def find_by_user(self, user):
+        """Finds all PEF references associated with a specific user.
+
+        Args:
+            user: The User object to filter references.
+
+        Returns:
+            List of Pef objects for the user.
+        """
+        return self.get_latest_for_user(user.username)
+
+    def create(self, reference_pef):
+        """Saves a new reference PEF for a user.
+
+        Args:
+            reference_pef: The Pef object to save.
+
+        Returns:
+            The saved Pef object.
+        """
+        if not reference_pef.created_at:
+            reference_pef.created_at = datetime.now().isoformat()
+
+        cursor = self._connection.cursor()
+        cursor.execute("""
+            INSERT INTO pef_reference (pef_id, username, value, created_at)
+            VALUES (?, ?, ?, ?)""",
+                       (reference_pef.pef_id,
+                        reference_pef.user.username if reference_pef.user else None,
+                        reference_pef.value,
+                        reference_pef.created_at))
+        self._connection.commit()
+        return reference_pef
+
+    def get_latest_for_user(self, username):
+        """Retrieves the PEF references for a username, oldest first.
+
+        Args:
+            username: The username to filter references.
+
+        Returns:
+            List of Pef objects for the user.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("""
+            SELECT r.pef_id, r.value, r.username, r.created_at, u.password
+            FROM pef_reference r
+            JOIN users u ON u.username = r.username
+            WHERE r.username = ?
+            ORDER BY r.created_at, r.rowid""",
+                       (username,))
+        return list(map(get_pef_by_row, cursor.fetchall()))
+
+    def delete_all(self):
+        """Deletes all PEF references from the database."""
+        cursor = self._connection.cursor()
+        cursor.execute("DELETE FROM pef_reference")
+        self._connection.commit()
+
+
+pef_reference_repository = PefReferenceRepository()
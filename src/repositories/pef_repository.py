@@ -1,19 +1,58 @@
+import os
 from pathlib import Path
 from entities.pef import Pef
-from repositories.user_repository import user_repository
+from repositories.user_repository import (
+    user_repository as default_user_repository
+)
 from config import PEF_FILE_PATH
 
 
+def read_rows(file_path):
+    """Yields the references of a reference file one row at a time.
+
+    Blank lines are skipped but counted, so the line numbers give the order
+    in which the references were written.
+
+    Args:
+        file_path: Path to the reference file.
+
+    Yields:
+        (line_number, pef_id, value, username) tuples. The username is None
+        for references without an owner.
+    """
+    with open(file_path, encoding="utf-8") as file:
+        for line_number, row in enumerate(file):
+            row = row.strip()
+            if not row:
+                continue
+            pef_id, value, username = row.split(";")
+            yield line_number, pef_id, float(value), username or None
+
+
 class PefRepository:
-    """Repository for managing PEF references stored in a file."""
+    """Repository for managing PEF references stored in a file.
+
+    The file is an append-only log: new references are appended as single rows
+    and the whole file is only rewritten by compact(). The log is read once,
+    on first use, into an in-memory index keyed by username which is then kept
+    up to date by create().
+
+    The application stores references in the pef_reference table. This class
+    reads and writes the file format that migrate_pef_file imports into that
+    table.
+    """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, user_repository=default_user_repository):
         """Initializes the repository with the file path.
 
         Args:
             file_path: Path to the file storing PEF references.
+            user_repository: Repository used to resolve the owners of references.
         """
         self._file_path = file_path
+        self._user_repository = user_repository
+        self._pefs = None
+        self._pefs_by_username = None
 
     def find_all(self):
         """Retrieves all PEF references from the file.
@@ -21,7 +60,8 @@ class PefRepository:
         Returns:
             List of Pef objects.
         """
-        return self._read()
+        self._ensure_loaded()
+        return list(self._pefs)
 
     def find_by_user(self, user):
         """Finds all PEF references associated with a specific user.
@@ -32,24 +72,22 @@ class PefRepository:
         Returns:
             List of Pef objects for the user.
         """
-        pefs = self.find_all()
-        user_pefs = filter(
-            lambda pef: pef.user and pef.user.username == user.username, pefs)
-        return list(user_pefs)
+        return self.get_latest_for_user(user.username)
 
     def create(self, reference_pef):
-        """Saves a new reference PEF for a user.
+        """Saves a new reference PEF for a user by appending it to the log.
 
         Args:
             reference_pef: The Pef object to save.
 
         Returns:
-            The list of Pef objects after addition.
+            The saved Pef object.
         """
-        pefs = self.find_all()
-        pefs.append(reference_pef)
-        self._write(pefs)
-        return pefs
+        self._ensure_loaded()
+        with open(self._file_path, "a", encoding="utf-8") as file:
+            file.write(self._format_row(reference_pef) + "\n")
+        self._add_to_index(reference_pef)
+        return reference_pef
 
     def get_latest_for_user(self, username):
         """Retrieves the latest PEF references for a username.
@@ -60,8 +98,45 @@ class PefRepository:
         Returns:
             List of Pef objects for the user.
         """
-        all_pefs = self.find_all()
-        return [pef for pef in all_pefs if pef.user and pef.user.username == username]
+        self._ensure_loaded()
+        return list(self._pefs_by_username.get(username, []))
+
+    def compact(self):
+        """Rewrites the log without blank lines or repeated reference ids.
+
+        The new file is written next to the old one and swapped in place, so
+        an interrupted compaction leaves the original log untouched. Meant to
+        be run offline, e.g. from a maintenance script.
+        """
+        self._ensure_file_exists()
+        rows = {}
+        with open(self._file_path, encoding="utf-8") as file:
+            for row in file:
+                row = row.strip()
+                if row:
+                    rows[row.split(";")[0]] = row
+
+        temp_path = f"{self._file_path}.compact"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for row in rows.values():
+                file.write(row + "\n")
+        os.replace(temp_path, self._file_path)
+        self._pefs = None
+
+    def _ensure_loaded(self):
+        """Reads the log into the in-memory index unless already done."""
+        if self._pefs is not None:
+            return
+        self._pefs = []
+        self._pefs_by_username = {}
+        for pef in self._read():
+            self._add_to_index(pef)
+
+    def _add_to_index(self, pef):
+        """Adds a Pef object to the in-memory index."""
+        self._pefs.append(pef)
+        if pef.user:
+            self._pefs_by_username.setdefault(pef.user.username, []).append(pef)
 
     def _ensure_file_exists(self):
         """Ensures the reference file exists, creating directories and file if necessary."""
@@ -72,37 +147,26 @@ class PefRepository:
     def _read(self):
         """Reads PEF references from the file.
 
+        The owners are resolved with one bulk query after the scan instead of
+        one query per row.
+
         Returns:
             List of Pef objects.
         """
-        pefs = []
-        self._ensure_file_exists()
-        with open(self._file_path, encoding="utf-8") as file:
-            for row in file:
-                row = row.strip()
-                if not row:
-                    continue
-                parts = row.split(";")
-                pef_id = parts[0]
-                value = float(parts[1])
-                username = parts[2]
-                user = user_repository.find_by_username(
-                    username) if username else None
-                pefs.append(Pef(value=value, user=user, pef_id=pef_id))
-        return pefs
-
-    def _write(self, pefs):
-        """Writes the list of Pef objects to the file.
-
-        Args:
-            pefs: List of Pef objects to write.
-        """
         self._ensure_file_exists()
-        with open(self._file_path, "w", encoding="utf-8") as file:
-            for pef in pefs:
-                username_str = pef.user.username if pef.user else ''
-                row = f"{pef.pef_id};{pef.value};{username_str}"
-                file.write(row + "\n")
+        rows = [row[1:] for row in read_rows(self._file_path)]
+
+        users = self._user_repository.find_by_usernames(
+            username for _, _, username in rows if username)
+        return [
+            Pef(value=value, user=users.get(username), pef_id=pef_id)
+            for pef_id, value, username in rows
+        ]
+
+    def _format_row(self, pef):
+        """Formats a Pef object as a single log row."""
+        username_str = pef.user.username if pef.user else ''
+        return f"{pef.pef_id};{pef.value};{username_str}"
 
 
 pef_repository = PefRepository(PEF_FILE_PATH)
@@ -1,5 +1,7 @@
 from entities.user import User
-from database_connection import get_database_connection
+from repositories.database_repository import DatabaseRepository
+
+MAX_QUERY_PARAMETERS = 900
 
 
 def get_user_by_row(row):
@@ -14,17 +16,9 @@ def get_user_by_row(row):
     return User(row["username"], row["password"]) if row else None
 
 
-class UserRepository:
+class UserRepository(DatabaseRepository):
     """Repository for managing user data in the database."""
 
-    def __init__(self, connection):
-        """Initializes with a database connection.
-
-        Args:
-            connection: The database connection object.
-        """
-        self._connection = connection
-
     def find_all(self):
         """Retrieves all users from the database.
 
@@ -50,6 +44,28 @@ class UserRepository:
         row = cursor.fetchone()
         return get_user_by_row(row)
 
+    def find_by_usernames(self, usernames):
+        """Finds several users with a single query.
+
+        Args:
+            usernames: Iterable of usernames to search for.
+
+        Returns:
+            Dictionary mapping each found username to its User object.
+        """
+        usernames = list(set(usernames))
+        users = {}
+        cursor = self._connection.cursor()
+        # SQLite limits the number of bound parameters per statement
+        for start in range(0, len(usernames), MAX_QUERY_PARAMETERS):
+            chunk = usernames[start:start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT * FROM users WHERE username IN ({placeholders})", chunk)
+            for row in cursor.fetchall():
+                users[row["username"]] = get_user_by_row(row)
+        return users
+
     def find_by_id(self, user_id):
         """Finds a user by user ID.
 
@@ -88,4 +104,4 @@ class UserRepository:
         self._connection.commit()
 
 
-user_repository = UserRepository(get_database_connection())
+user_repository = UserRepository()
@@ -0,0 +1,113 @@
+from bisect import bisect_left, bisect_right
+
+
+def _average(points):
+    """Returns the average x and y of a list of (x, y) pairs."""
+    return (sum(x for x, _y in points) / len(points),
+            sum(y for _x, y in points) / len(points))
+
+
+def largest_triangle_three_buckets(points, threshold):
+    """Downsamples a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are kept. The points in between are split into
+    threshold - 2 buckets, and from each bucket the point that forms the
+    largest triangle with the previously chosen point and the average of the
+    next bucket is kept. Peaks and dips stay visible, unlike with averaging.
+
+    Args:
+        points: List of (x, y) pairs sorted by x.
+        threshold: Maximum number of points to return, at least 3.
+
+    Returns:
+        List of at most threshold points of the series.
+    """
+    if threshold >= len(points):
+        return list(points)
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    sampled = [points[0]]
+    chosen_x, chosen_y = points[0]
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        average_x, average_y = _average(
+            points[end:min(int((bucket + 2) * bucket_size) + 1, len(points))])
+
+        largest = points[start]
+        largest_area = -1
+        for point in points[start:end]:
+            # Twice the triangle area, which is enough for comparing
+            area = abs((chosen_x - average_x) * (point[1] - chosen_y)
+                       - (chosen_x - point[0]) * (average_y - chosen_y))
+            if area > largest_area:
+                largest_area = area
+                largest = point
+
+        sampled.append(largest)
+        chosen_x, chosen_y = largest
+
+    sampled.append(points[-1])
+    return sampled
+
+
+class DownsampledSeries:
+    """A series with precomputed coarser levels for drawing any part of it.
+
+    Each level is the previous one downsampled by factor with
+    largest_triangle_three_buckets. A window of the series is downsampled
+    from the finest level that has at most window_limit points in the
+    window, so the work per window depends on the pixel width and not on
+    the length of the series.
+    """
+
+    def __init__(self, points, factor=4, window_limit=4096):
+        """Builds the levels.
+
+        Args:
+            points: List of (x, y) pairs sorted by x.
+            factor: How many times fewer points each level has.
+            window_limit: Maximum number of points downsampled per window.
+        """
+        self._window_limit = window_limit
+        self._levels = [list(points)]
+        while len(self._levels[-1]) > window_limit:
+            level = self._levels[-1]
+            self._levels.append(
+                largest_triangle_three_buckets(level, max(3, len(level) // factor)))
+        self._level_xs = [[x for x, _y in level] for level in self._levels]
+
+    def __len__(self):
+        return len(self._levels[0])
+
+    def bounds(self):
+        """Returns (first x, last x, lowest y, highest y), or None if empty."""
+        points = self._levels[0]
+        if not points:
+            return None
+        values = [y for _x, y in points]
+        return points[0][0], points[-1][0], min(values), max(values)
+
+    def window(self, start_x, end_x, threshold):
+        """Returns the points between start_x and end_x, downsampled.
+
+        The nearest point outside the window on each side is included, so a
+        line drawn through the points reaches the edges of the window.
+
+        Args:
+            start_x: First x of the window.
+            end_x: Last x of the window.
+            threshold: Maximum number of points, e.g. the width in pixels.
+
+        Returns:
+            List of (x, y) pairs sorted by x.
+        """
+        for level, xs in zip(self._levels, self._level_xs):
+            start = max(bisect_left(xs, start_x) - 1, 0)
+            end = min(bisect_right(xs, end_x) + 1, len(xs))
+            if end - start <= self._window_limit or level is self._levels[-1]:
+                return largest_triangle_three_buckets(level[start:end], threshold)
+        return []
@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+
+class _RowValues:
+    """Highest blows of the rows by (date, state, time), with their range and sum."""
+
+    def __init__(self):
+        self._values = {}
+        self.highest = None
+        self.lowest = None
+        self.total = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def set(self, key, value):
+        """Stores the value of a row, replacing an earlier value of the same key."""
+        previous_value = self._values.get(key)
+        self._values[key] = value
+
+        if previous_value is None:
+            self.total += value
+        else:
+            self.total += value - previous_value
+            if previous_value in (self.highest, self.lowest):
+                self.highest = max(self._values.values())
+                self.lowest = min(self._values.values())
+                return
+
+        self.highest = value if self.highest is None else max(self.highest, value)
+        self.lowest = value if self.lowest is None else min(self.lowest, value)
+
+
+class MonitoringAggregate:
+    """Running summary figures of a set of PEF monitoring rows.
+
+    Each added row updates the daily slot maxima, the threshold counts of its
+    day and the highest, lowest and total PEF in constant time, so the summary
+    can be read without going through the rows again. The day rules are
+    passed in by PefService so that both calculations stay the same.
+
+    Attributes:
+        over_20: Number of days with a daily variation over the limit.
+        over_15: Number of bronchodilator responses over the limit.
+    """
+
+    def __init__(self, get_max_value, assign_max_value, process_day_thresholds):
+        """Initializes an empty aggregate.
+
+        Args:
+            get_max_value: Returns the highest blow of a row.
+            assign_max_value: Stores the highest blow of a row in the day's slots.
+            process_day_thresholds: Adds a day's threshold counts to a dictionary.
+        """
+        self._get_max_value = get_max_value
+        self._assign_max_value = assign_max_value
+        self._process_day_thresholds = process_day_thresholds
+        self._days = defaultdict(lambda: {
+            "max_m": None, "max_m_p": None, "max_e": None, "max_e_p": None
+        })
+        self._day_thresholds = {}
+        self._values = _RowValues()
+        self.over_20 = 0
+        self.over_15 = 0
+
+    @property
+    def highest(self):
+        """Highest PEF value, or None."""
+        return self._values.highest
+
+    @property
+    def lowest(self):
+        """Lowest PEF value, or None."""
+        return self._values.lowest
+
+    @property
+    def total(self):
+        """Sum of the PEF values."""
+        return self._values.total
+
+    def add(self, values):
+        """Adds a row, replacing an earlier row of the same date, state and time.
+
+        Args:
+            values: Mapping with date, value1, value2, value3, state and time.
+        """
+        date = values["date"]
+        self._values.set((date, values["state"], values["time"]),
+                         self._get_max_value(values))
+
+        day = self._days[date]
+        self._assign_max_value(values, day)
+        thresholds = {"over_20": 0, "over_15": 0}
+        self._process_day_thresholds(day, thresholds)
+        previous_thresholds = self._day_thresholds.get(date, {"over_20": 0, "over_15": 0})
+        self.over_20 += thresholds["over_20"] - previous_thresholds["over_20"]
+        self.over_15 += thresholds["over_15"] - previous_thresholds["over_15"]
+        self._day_thresholds[date] = thresholds
+
+    @property
+    def row_count(self):
+        """Number of rows in the aggregate."""
+        return len(self._values)
+
+    def summary_data(self):
+        """Returns the figures in the form used by PefService summaries."""
+        return {
+            "over_20": self.over_20,
+            "over_15": self.over_15,
+            "monitored_days_count": len(self._days),
+            "highest": self.highest,
+            "lowest": self.lowest,
+            "average": self.total / self.row_count if self.row_count else None,
+        }
@@ -0,0 +1,141 @@
+"""Vectorized calculation of PEF monitoring summaries for many sessions.
+
+NumPy is an optional dependency. When it is not installed, is_available()
+returns False and PefService falls back to its own pure Python calculation.
+"""
+# NumPy is only imported when a summary is calculated, so that it is not
+# loaded on application startup. It may be missing, which is_available()
+# checks before any of the functions below are called.
+# pylint: disable=import-outside-toplevel,import-error
+import importlib.util
+from entities.pef_monitoring import AFTER_MEDICATION, BEFORE_MEDICATION, EVENING, MORNING
+
+# Labels along the time of day and medication state axes of the day array
+TIMES_OF_DAY = (MORNING, EVENING)
+STATES = (BEFORE_MEDICATION, AFTER_MEDICATION)
+
+
+def is_available():
+    """Returns True if NumPy can be used."""
+    return importlib.util.find_spec("numpy") is not None
+
+
+def summarize_sessions(pefs_by_session):
+    """Calculates the summary figures of many sessions at once.
+
+    The highest blow of every row is placed in a days x {morning, evening} x
+    {before, after} array, from which the daily variation, bronchodilator
+    response and threshold counts of all sessions are computed together.
+    The rules are the same as in PefService.calculate_monitoring_difference.
+
+    Args:
+        pefs_by_session: List with the PEF rows of each session.
+
+    Returns:
+        List of summary data dictionaries with over_20, over_15,
+        monitored_days_count, highest, lowest and average, in session order.
+    """
+    import numpy as np
+
+    session_count = len(pefs_by_session)
+    row_counts = np.array([len(pefs) for pefs in pefs_by_session], dtype=np.intp)
+    if not row_counts.sum():
+        return [_summary_data((0, 0, 0), (None, None, None)) for _ in range(session_count)]
+
+    rows = [row for pefs in pefs_by_session for row in pefs]
+    values = np.maximum(np.maximum(np.array([row["value1"] for row in rows]),
+                                   np.array([row["value2"] for row in rows])),
+                        np.array([row["value3"] for row in rows]))
+    row_days, day_sessions = _number_days(rows, row_counts)
+    days = _day_array(rows, values, row_days, len(day_sessions))
+    counts = _threshold_counts(days, day_sessions, session_count)
+    stats = _session_stats(values, row_counts)
+
+    return [_summary_data(session_counts, session_stats)
+            for session_counts, session_stats in zip(counts, stats)]
+
+
+def _number_days(rows, row_counts):
+    """Numbers the days of every session, a day being a (session, date) pair.
+
+    Returns:
+        The day number of every row and the session of every day.
+    """
+    import numpy as np
+
+    row_sessions = np.repeat(np.arange(len(row_counts)), row_counts)
+    dates, date_codes = np.unique(np.array([row["date"] for row in rows]),
+                                  return_inverse=True)
+    day_keys, row_days = np.unique(row_sessions * len(dates) + date_codes.ravel(),
+                                   return_inverse=True)
+    return row_days.ravel(), day_keys // len(dates)
+
+
+def _day_array(rows, values, row_days, day_count):
+    """Places the highest blow of every row in its day's time and state slot."""
+    import numpy as np
+
+    times_of_day = _axis_positions(np.array([row["time"] for row in rows]), TIMES_OF_DAY)
+    states = _axis_positions(np.array([row["state"] for row in rows]), STATES)
+
+    # Rows are in input order, so a later row of the same slot wins as in PefService
+    days = np.full((day_count, 2, 2), np.nan)
+    known = (times_of_day >= 0) & (states >= 0)
+    days[row_days[known], times_of_day[known], states[known]] = values[known]
+    return days
+
+
+def _threshold_counts(days, day_sessions, session_count):
+    """Returns (over_20, over_15, monitored days) of every session."""
+    import numpy as np
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        before = days[:, :, 0]
+        after = days[:, :, 1]
+        difference = np.abs(before[:, 0] - before[:, 1])
+        variation = difference / np.maximum(before[:, 0], before[:, 1]) * 100
+        over_20_days = (variation >= 20) & (difference >= 60)
+        responses = ((after - before) / before * 100 >= 15).sum(axis=1)
+
+    over_20 = np.bincount(day_sessions[over_20_days], minlength=session_count)
+    over_15 = np.zeros(session_count, dtype=np.intp)
+    np.add.at(over_15, day_sessions, responses)
+    monitored_days = np.bincount(day_sessions, minlength=session_count)
+    return zip(over_20.tolist(), over_15.tolist(), monitored_days.tolist())
+
+
+def _session_stats(values, row_counts):
+    """Returns (highest, lowest, average) of every session, Nones if it has no rows."""
+    import numpy as np
+
+    # Rows of a session are contiguous, so each non-empty session is one segment
+    non_empty = row_counts > 0
+    starts = (np.cumsum(row_counts) - row_counts)[non_empty]
+    segments = iter(zip(np.maximum.reduceat(values, starts).tolist(),
+                        np.minimum.reduceat(values, starts).tolist(),
+                        (np.add.reduceat(values, starts) / row_counts[non_empty]).tolist()))
+    return [next(segments) if row_count else (None, None, None)
+            for row_count in row_counts]
+
+
+def _axis_positions(labels, names):
+    """Returns the position of every label in names, or -1 for other labels."""
+    import numpy as np
+
+    positions = np.full(len(labels), -1, dtype=np.intp)
+    for position, name in enumerate(names):
+        positions[labels == name] = position
+    return positions
+
+
+def _summary_data(counts, stats):
+    over_20, over_15, monitored_days_count = counts
+    highest, lowest, average = stats
+    return {
+        "over_20": over_20,
+        "over_15": over_15,
+        "monitored_days_count": monitored_days_count,
+        "highest": highest,
+        "lowest": lowest,
+        "average": average,
+    }
@@ -1,19 +1,39 @@
+import calendar
+import datetime
+import threading
 from collections import defaultdict
 from entities.user import User
 from entities.pef import Pef
-from entities.pef_monitoring import PefMonitoring
-
-
-from repositories.pef_repository import (
-    pef_repository as default_pef_repository
+from entities.pef_monitoring import (
+    AFTER_MEDICATION, BEFORE_MEDICATION, EVENING, MORNING, PefMonitoring
+)
+from services import monitoring_engine
+from services.downsampling import DownsampledSeries
+from services.monitoring_aggregate import MonitoringAggregate
+from services.read_cache import ReadCache
+from services.session_interval_index import SessionIntervalIndex
+
+from repositories.pef_reference_repository import (
+    pef_reference_repository as default_pef_repository
 )
 from repositories.user_repository import (
     user_repository as default_user_repository
 )
 from repositories.pef_monitorin_repository import (
+    BULK_BATCH_SIZE,
+    PAGE_SIZE,
     pef_monitoring_repository as default_pef_monitoring_repository
 )
 
+# Version of the summary rules and messages. Stored session summaries of an
+# older version are computed again, so bump this whenever they change.
+SUMMARY_RULES_VERSION = 2
+
+# Change notifications sent to the listeners of PefService
+MONITORING_ADDED = "monitoring_added"
+MONITORING_IMPORTED = "monitoring_imported"
+SESSION_CREATED = "session_created"
+
 
 class InvalidCredentialsError(Exception):
     pass
@@ -27,7 +47,13 @@ class PasswordsDoNotMatch(Exception):
     pass
 
 
-class PefService:
+class DuplicateMeasurementError(Exception):
+    pass
+
+
+# The UI talks to this one service object, and the in-memory aggregates and
+# caches it keeps are part of that facade, so the class is allowed to be large
+class PefService:  # pylint: disable=too-many-public-methods,too-many-instance-attributes
     """Service class providing functionalities related to PEF monitoring.
 
     Attributes:
@@ -35,6 +61,16 @@ class PefService:
         _pef_repository: Repository for PEF objects, managing database interactions.
         _user_repository: Repository for user management.
         _pef_monitoring_repository: Repository for monitoring event management.
+        _unfinished_aggregates: Running aggregate of the measurements outside
+            finished sessions, by username.
+        _finished_sessions: SessionIntervalIndex of the finished sessions,
+            by username, loaded together with the running aggregate.
+        _session_aggregates: Aggregates of finished sessions that have been
+            viewed, by (username, start_date, end_date).
+        _aggregate_lock: Guards the aggregates and session indexes, which
+            the UI reads and updates from its worker thread.
+        _read_cache: Recent query results, dropped by the write methods.
+        _listeners: Functions notified of changes to monitoring data.
     """
 
     def __init__(
@@ -48,6 +84,38 @@ class PefService:
         self._pef_repository = pef_repository
         self._user_repository = user_repository
         self._pef_monitoring_repository = pef_monitoring_repository
+        self._unfinished_aggregates = {}
+        self._finished_sessions = {}
+        self._session_aggregates = {}
+        self._aggregate_lock = threading.RLock()
+        self._read_cache = ReadCache()
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Registers a function to be notified of changes to monitoring data.
+
+        The listener is called as listener(event, data) on the thread that
+        made the change:
+
+        - MONITORING_ADDED: data is the stored PefMonitoring object
+        - SESSION_CREATED: data is a dictionary with username, start_date
+          and end_date
+        - MONITORING_IMPORTED: data is None, any number of measurements
+          may have been added
+
+        Args:
+            listener: The function to register.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Unregisters a function registered with add_listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, data):
+        for listener in list(self._listeners):
+            listener(event, data)
 
     def get_reference_pef_for_user(self):
         """Fetches the latest reference PEF for the logged-in user.
@@ -58,8 +126,10 @@ class PefService:
         if not self._user:
             return []
 
-        ref = self._pef_repository.get_latest_for_user(self._user.username)
-        return list(ref)
+        username = self._user.username
+        return self._read_cache.get(
+            (username, "reference_pef"),
+            lambda: list(self._pef_repository.get_latest_for_user(username)))
 
     def get_user_pef(self):
         """Retrieves the PEF data for the logged-in user.
@@ -104,6 +174,7 @@ class PefService:
 
         ref_pef = Pef(value=reference_pef_value, user=user)
         self._pef_repository.create(ref_pef)
+        self._read_cache.invalidate(user.username)
         return ref_pef
 
     def login(self, username, password):
@@ -236,6 +307,153 @@ class PefService:
         self._pef_monitoring_repository.create_monitoring_session(
             username, start_date, end_date
         )
+        self._read_cache.invalidate(username)
+        # The measurements that are still unfinished are reloaded when needed
+        with self._aggregate_lock:
+            self._unfinished_aggregates.pop(username, None)
+            self._finished_sessions.pop(username, None)
+        self._notify(SESSION_CREATED, {
+            "username": username, "start_date": start_date, "end_date": end_date})
+
+    def finish_monitoring_session(self, username, start_date, end_date):
+        """Stores the current monitoring period as a session.
+
+        Args:
+            username: The user's username.
+            start_date: Start date.
+            end_date: End date.
+
+        Returns:
+            Summary of the measurements of the period.
+        """
+        summary = self.get_unfinished_monitoring_summary(username)
+        self.create_monitoring_session(username, start_date, end_date)
+        return summary
+
+    def get_unfinished_monitoring_summary(self, username):
+        """Returns the summary of the measurements outside finished sessions.
+
+        The summary is read from a running aggregate that
+        add_value_to_monitoring keeps up to date.
+
+        Args:
+            username: The user's username.
+
+        Returns:
+            Summary of change values.
+        """
+        with self._aggregate_lock:
+            aggregate = self._unfinished_aggregates.get(username)
+            if aggregate is None:
+                aggregate = self._load_unfinished_aggregate(username)
+            summary_data = aggregate.summary_data()
+        return self._build_monitoring_summary(summary_data)
+
+    def get_session_summary(self, username, start_date, end_date):
+        """Returns the summary of a finished session.
+
+        The summary is stored with the session, so it is normally read from
+        a single row. It is computed from the measurements when none is
+        stored yet, a measurement of the session has changed or the rules
+        have changed since. The aggregate built then is kept up to date by
+        add_value_to_monitoring.
+
+        Args:
+            username: The user's username.
+            start_date: Start date.
+            end_date: End date.
+
+        Returns:
+            Summary of change values.
+        """
+        key = (username, start_date, end_date)
+        with self._aggregate_lock:
+            aggregate = self._session_aggregates.get(key)
+            summary_data = None if aggregate is None else aggregate.summary_data()
+        if summary_data is not None:
+            return self._build_monitoring_summary(summary_data)
+
+        stored = self._pef_monitoring_repository.get_stored_session_summary(
+            username, start_date, end_date)
+        if stored is not None and stored["summary_version"] == SUMMARY_RULES_VERSION:
+            return {
+                "over_20": stored["over_20"],
+                "over_15": stored["over_15"],
+                "highest": stored["highest"],
+                "lowest": stored["lowest"],
+                "average": stored["average"],
+                "warning_message": stored["warning_message"],
+            }
+
+        aggregate = self._build_aggregate(
+            self.get_pef_entries_for_session(username, start_date, end_date))
+        with self._aggregate_lock:
+            self._session_aggregates[key] = aggregate
+            summary_data = aggregate.summary_data()
+        summary = self._build_monitoring_summary(summary_data)
+        if stored is not None:
+            self._pef_monitoring_repository.store_session_summary(
+                username, start_date, end_date, summary, SUMMARY_RULES_VERSION)
+        return summary
+
+    def check_monitoring_aggregates(self):
+        """Rebuilds every loaded aggregate from the stored measurements.
+
+        Returns:
+            List of the keys whose aggregate differed from the stored
+            measurements: a username for a running aggregate and
+            (username, start_date, end_date) for a session.
+        """
+        mismatched = []
+        with self._aggregate_lock:
+            for username, aggregate in list(self._unfinished_aggregates.items()):
+                rebuilt = self._load_unfinished_aggregate(username)
+                if rebuilt.summary_data() != aggregate.summary_data():
+                    mismatched.append(username)
+            for key, aggregate in list(self._session_aggregates.items()):
+                rebuilt = self._build_aggregate(self.get_pef_entries_for_session(*key))
+                self._session_aggregates[key] = rebuilt
+                if rebuilt.summary_data() != aggregate.summary_data():
+                    mismatched.append(key)
+        return mismatched
+
+    def _build_aggregate(self, pefs):
+        aggregate = MonitoringAggregate(
+            self._get_max_value, self._assign_max_value, self._process_day_thresholds)
+        for values in pefs:
+            aggregate.add(values)
+        return aggregate
+
+    def _load_unfinished_aggregate(self, username):
+        aggregate = self._build_aggregate(
+            self._pef_monitoring_repository.find_unfinished_monitoring(username))
+        finished_sessions = self.get_finished_session_index(username)
+        with self._aggregate_lock:
+            self._unfinished_aggregates[username] = aggregate
+            self._finished_sessions[username] = finished_sessions
+        return aggregate
+
+    def _update_aggregates(self, pef_monitoring):
+        """Adds a stored measurement to the loaded aggregates it belongs to."""
+        username = pef_monitoring.username
+        date = str(pef_monitoring.date)
+        values = {
+            "date": date,
+            "value1": int(pef_monitoring.value1),
+            "value2": int(pef_monitoring.value2),
+            "value3": int(pef_monitoring.value3),
+            "state": pef_monitoring.state,
+            "time": pef_monitoring.time,
+        }
+
+        with self._aggregate_lock:
+            if (username in self._unfinished_aggregates
+                    and not self._finished_sessions[username].contains(date)):
+                self._unfinished_aggregates[username].add(values)
+
+            for (session_username, start, end), aggregate in self._session_aggregates.items():
+                if session_username == username and start <= date <= end:
+                    aggregate.add(values)
 
     def get_sessions_by_username(self, username):
         """Retrieves all monitoring sessions for a user.
@@ -246,7 +464,105 @@ class PefService:
         Returns:
             List of sessions.
         """
-        return self._pef_monitoring_repository.get_sessions_by_username(username)
+        return self._read_cache.get(
+            (username, "sessions"),
+            lambda: self._pef_monitoring_repository.get_sessions_by_username(username))
+
+    def get_finished_session_index(self, username):
+        """Returns an index of the date ranges of a user's finished sessions.
+
+        Args:
+            username: The user's username.
+
+        Returns:
+            SessionIntervalIndex of the sessions.
+        """
+        return SessionIntervalIndex(
+            (session["start_date"], session["end_date"])
+            for session in self.get_sessions_by_username(username))
+
+    def get_unfinished_monitoring(self, username):
+        """Retrieves the measurements that do not belong to a finished session.
+
+        Args:
+            username: The user's username.
+
+        Returns:
+            List of monitoring rows ordered by date and time.
+        """
+        return self._read_cache.get(
+            (username, "unfinished_monitoring"),
+            lambda: self._pef_monitoring_repository.find_unfinished_monitoring(username))
+
+    def get_unfinished_monitoring_page(self, username, after=None, page_size=PAGE_SIZE):
+        """Retrieves one page of the measurements outside finished sessions.
+
+        Args:
+            username: The user's username.
+            after: (date, time, id) of the last row of the previous page.
+            page_size: Maximum number of rows.
+
+        Returns:
+            List of monitoring rows ordered by date and time.
+        """
+        return self._read_cache.get(
+            (username, "unfinished_monitoring_page", after, page_size),
+            lambda: self._pef_monitoring_repository.find_unfinished_monitoring_page(
+                username, after=after, page_size=page_size))
+
+    def get_unfinished_monitoring_span(self, username):
+        """Returns the number and date range of the measurements outside finished sessions.
+
+        Args:
+            username: The user's username.
+
+        Returns:
+            Row with row_count, first_date and last_date.
+        """
+        return self._read_cache.get(
+            (username, "unfinished_monitoring_span"),
+            lambda: self._pef_monitoring_repository.get_unfinished_monitoring_span(username))
+
+    def count_measurements_by_month(self, username, year, month):
+        """Counts a user's measurements per day of a month.
+
+        Args:
+            username: The user's username.
+            year: The year.
+            month: The month, 1-12.
+
+        Returns:
+            Dictionary of measurement counts by ISO date. Days without
+            measurements are left out.
+        """
+        first_day = datetime.date(year, month, 1)
+        last_day = first_day.replace(day=calendar.monthrange(year, month)[1])
+        return self._read_cache.get(
+            (username, "measurement_counts", year, month),
+            lambda: self._pef_monitoring_repository.count_measurements_by_date(
+                username, first_day.isoformat(), last_day.isoformat()))
+
+    def count_sessions(self, username):
+        """Returns the number of a user's monitoring sessions."""
+        return self._read_cache.get(
+            (username, "session_count"),
+            lambda: self._pef_monitoring_repository.count_sessions(username))
+
+    def get_sessions_page(self, username, after=None, page_size=PAGE_SIZE):
+        """Retrieves one page of a user's monitoring sessions, newest first.
+
+        Args:
+            username: The user's username.
+            after: (start_date, id) of the last session of the previous page.
+            page_size: Maximum number of sessions.
+
+        Returns:
+            List of sessions.
+        """
+        return self._read_cache.get(
+            (username, "sessions_page", after, page_size),
+            lambda: self._pef_monitoring_repository.get_sessions_page(
+                username, after=after, page_size=page_size))
 
     def get_pef_entries_for_session(self, username, start_date, end_date):
         """Fetches PEF data for a specific session.
@@ -263,7 +579,9 @@ class PefService:
             username, start_date, end_date
         )
 
-    def add_value_to_monitoring(self, date, username, value1, value2, value3, state, time):
+    # replace is a keyword-only option on top of the fields of a measurement
+    def add_value_to_monitoring(  # pylint: disable=too-many-arguments
+            self, date, username, value1, value2, value3, state, time, *, replace=False):
         """Adds a new PEF monitoring event.
 
         Args:
@@ -272,29 +590,113 @@ class PefService:
             value1: First PEF value.
             value2: Second PEF value.
             value3: Third PEF value.
-            state: State ('BEFORE MEDICATION' or 'AFTER MEDICATION').
-            time: Time ('MORNING' or 'EVENING').
+            state: State (BEFORE_MEDICATION or AFTER_MEDICATION).
+            time: Time (MORNING or EVENING).
+            replace: If True, an existing event with the same date, state and
+                time is overwritten.
+
+        Raises:
+            DuplicateMeasurementError: If such an event exists and replace is False.
 
         Returns:
             The added PefMonitoring object.
         """
-        pef_m = self._pef_monitoring_repository.add_value(PefMonitoring(
-            username, date, value1, value2, value3, state, time
-        ))
+        pef_m = PefMonitoring(username, date, value1, value2, value3, state, time)
+        stored_id = self._pef_monitoring_repository.add_value(
+            pef_m, on_conflict="replace" if replace else "ignore")
+        if stored_id is None:
+            raise DuplicateMeasurementError(
+                "Tälle päivälle on jo tehty seuranta näillä parametreillä.")
+        self._read_cache.invalidate(username)
+        self._update_aggregates(pef_m)
+        self._notify(MONITORING_ADDED, pef_m)
         return pef_m
 
+    def add_values_to_monitoring_bulk(self, pef_monitorings, batch_size=BULK_BATCH_SIZE):
+        """Adds many PEF monitoring events, e.g. when importing device data.
+
+        Args:
+            pef_monitorings: Iterable of PefMonitoring objects.
+            batch_size: Number of events stored per transaction.
+
+        Returns:
+            Dictionary with the numbers of inserted and rejected events.
+        """
+        counts = self._pef_monitoring_repository.add_values(
+            pef_monitorings, batch_size=batch_size)
+        # Bulk imports are not tracked row by row, so the aggregates are rebuilt
+        self._read_cache.invalidate()
+        self._clear_aggregates()
+        self._notify(MONITORING_IMPORTED, None)
+        return counts
+
     def get_monitoring_by_username(self):
         """Retrieves the logged-in user's monitoring and PEF data.
 
         Returns:
-            List of ordered PefMonitoring objects or None if not logged in.
+            List of monitoring rows ordered by date and time, or None if not
+            logged in.
         """
         if not self._user:
             return None
-        res = self._pef_monitoring_repository.find_monitoring_by_username(
-            self._user.username
-        )
-        return self._pef_monitoring_repository.order_by_date(res)
+        return self._read_cache.get(
+            (self._user.username, "monitoring"),
+            lambda: list(self.iter_monitoring_by_username()))
+
+    def get_pef_trend(self):
+        """Returns the logged-in user's PEF over time for drawing a trend chart.
+
+        Each measurement is a point whose x is the date as a day number,
+        plus half a day in the evening, and whose y is the highest blow.
+
+        Returns:
+            DownsampledSeries of the points, empty if no user is logged in.
+        """
+        if not self._user:
+            return DownsampledSeries([])
+
+        def load():
+            points = []
+            for row in self.iter_monitoring_by_username():
+                day = datetime.date.fromisoformat(str(row["date"])).toordinal()
+                if row["time"] == EVENING:
+                    day += 0.5
+                points.append((day, self._get_max_value(row)))
+            points.sort()
+            return DownsampledSeries(points)
+
+        return self._read_cache.get((self._user.username, "pef_trend"), load)
+
+    def get_monitoring_page(self, after=None, page_size=PAGE_SIZE):
+        """Retrieves one page of the logged-in user's monitoring data.
+
+        Args:
+            after: (date, id) of the last row of the previous page.
+            page_size: Maximum number of rows.
+
+        Returns:
+            List of monitoring rows ordered by date, empty if not logged in.
+        """
+        if not self._user:
+            return []
+        return self._pef_monitoring_repository.find_monitoring_page(
+            self._user.username, after=after, page_size=page_size)
+
+    def iter_monitoring_by_username(self, since=None, limit=None):
+        """Iterates over the logged-in user's monitoring data lazily.
+
+        Args:
+            since: Optional first date to include.
+            limit: Optional maximum number of rows.
+
+        Returns:
+            Iterator of monitoring rows ordered by date and time. Empty if
+            no user is logged in.
+        """
+        if not self._user:
+            return iter(())
+        return self._pef_monitoring_repository.iter_monitoring_by_username(
+            self._user.username, since=since, limit=limit)
 
     def calculate_monitoring_difference_for_session(self, username, start_date, end_date):
         """Calculates the change in PEF during a specific session.
@@ -311,6 +713,50 @@ class PefService:
         unique_days = set(p["date"] for p in pefs)
         return self.calculate_monitoring_difference(pefs, len(unique_days))
 
+    def calculate_monitoring_difference_in_database(self, username, start_date, end_date):
+        """Calculates the same summary as calculate_monitoring_difference_for_session.
+
+        The figures are aggregated by the database in a single query instead
+        of loading every row of the session.
+
+        Args:
+            username: The user's username.
+            start_date: Start date.
+            end_date: End date.
+
+        Returns:
+            Summary of change values.
+        """
+        summary_data = self._pef_monitoring_repository.get_session_summary_data(
+            username, start_date, end_date)
+        return self._build_monitoring_summary(summary_data)
+
+    def calculate_monitoring_differences_for_sessions(self, sessions):
+        """Calculates the summaries of many sessions at once.
+
+        Uses the vectorized engine when NumPy is installed and the same
+        calculation as calculate_monitoring_difference otherwise.
+
+        Args:
+            sessions: Iterable of sessions with username, start_date and end_date.
+
+        Returns:
+            List of summaries in the order of the sessions.
+        """
+        pefs_by_session = [
+            self.get_pef_entries_for_session(
+                session["username"], session["start_date"], session["end_date"])
+            for session in sessions
+        ]
+        if monitoring_engine.is_available():
+            summary_data = monitoring_engine.summarize_sessions(pefs_by_session)
+        else:
+            summary_data = [
+                self._calculate_summary_data(pefs, len(set(p["date"] for p in pefs)))
+                for pefs in pefs_by_session
+            ]
+        return [self._build_monitoring_summary(data) for data in summary_data]
+
     def calculate_monitoring_difference(self, pefs, monitored_days_count):
         """Calculates PEF value fluctuations and provides summaries.
 
@@ -321,6 +767,11 @@ class PefService:
         Returns:
             Summary data including change values and warnings.
         """
+        return self._build_monitoring_summary(
+            self._calculate_summary_data(pefs, monitored_days_count))
+
+    def _calculate_summary_data(self, pefs, monitored_days_count):
+        """Calculates the threshold counts and PEF statistics of the rows."""
         thresholds = {"over_20": 0, "over_15": 0}
         daily_data = defaultdict(lambda: {
             "max_m": None, "max_m_p": None, "max_e": None, "max_e_p": None
@@ -341,7 +792,7 @@ class PefService:
         # Calculate highest, lowest, and average PEF
         highest, lowest, average = self._calculate_pef_stats(all_pef_values)
 
-        summary_data = {
+        return {
             "over_20": thresholds["over_20"],
             "over_15": thresholds["over_15"],
             "monitored_days_count": monitored_days_count,
@@ -349,7 +800,6 @@ class PefService:
             "lowest": lowest,
             "average": average
         }
-        return self._build_monitoring_summary(summary_data)
 
     def _process_day_thresholds(self, vals, thresholds):
         """Processes PEF data for one day and updates thresholds."""
@@ -399,15 +849,15 @@ class PefService:
     def _assign_max_value(self, values, daily_values):
         """Assigns and stores the maximum value for the day and its timing."""
         max_val = self._get_max_value(values)
-        if values["state"] == 'BEFORE MEDICATION':
-            if values["time"] == 'MORNING':
+        if values["state"] == BEFORE_MEDICATION:
+            if values["time"] == MORNING:
                 daily_values["max_m"] = max_val
-            elif values["time"] == 'EVENING':
+            elif values["time"] == EVENING:
                 daily_values["max_e"] = max_val
-        elif values["state"] == 'AFTER MEDICATION':
-            if values["time"] == 'MORNING':
+        elif values["state"] == AFTER_MEDICATION:
+            if values["time"] == MORNING:
                 daily_values["max_m_p"] = max_val
-            elif values["time"] == 'EVENING':
+            elif values["time"] == EVENING:
                 daily_values["max_e_p"] = max_val
 
     def _get_max_value(self, values):
@@ -447,6 +897,10 @@ class PefService:
             "warning_message": warning_message,
         }
 
+    def get_cache_stats(self):
+        """Returns the hit and miss counters of the read cache."""
+        return self._read_cache.stats()
+
     def get_current_user(self):
         """Returns the currently logged-in user or None."""
         return self._user
@@ -458,6 +912,13 @@ class PefService:
     def logout(self):
         """Logs out the current user."""
         self._user = None
+        self._clear_aggregates()
+
+    def _clear_aggregates(self):
+        with self._aggregate_lock:
+            self._unfinished_aggregates.clear()
+            self._finished_sessions.clear()
+            self._session_aggregates.clear()
 
     def create_user(self, username, password, password2, login=True):
         """Creates a new user if the username is available and passwords match.
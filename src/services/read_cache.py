@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from config import READ_CACHE_SIZE, READ_CACHE_TTL
+
+
+class ReadCache:
+    """Least recently used cache of query results, grouped by username.
+
+    Keys are tuples starting with the username, so all results of a user can
+    be dropped when the user's data changes. Entries also expire after ttl
+    seconds, which bounds how stale a result can be if the database is
+    changed by someone else. The cache can be used from several threads.
+
+    Attributes:
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups that had to load the value.
+    """
+
+    def __init__(self, max_size=READ_CACHE_SIZE, ttl=READ_CACHE_TTL, clock=time.monotonic):
+        """Initializes an empty cache.
+
+        Args:
+            max_size: Maximum number of entries.
+            ttl: Seconds an entry stays valid.
+            clock: Function returning the current time in seconds.
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """Returns the cached value of key, loading and storing it if needed.
+
+        Args:
+            key: Tuple whose first item is the username.
+            load: Function returning the value.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self._ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+
+        with self._lock:
+            # A value loaded while the cache was invalidated may already be stale
+            if generation == self._generation:
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, username=None):
+        """Drops the entries of a user, or all entries if username is None."""
+        with self._lock:
+            self._generation += 1
+            if username is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+
+    def stats(self):
+        """Returns the hit and miss counters and the number of entries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,46 @@
+from bisect import bisect_left, bisect_right
+
+
+class SessionIntervalIndex:
+    """Sorted, non-overlapping date ranges of finished monitoring sessions.
+
+    Overlapping sessions are merged, so finding out whether a date belongs
+    to a finished session is one bisection however many sessions there are.
+    Dates are ISO format strings, which sort like the dates.
+    """
+
+    def __init__(self, ranges=()):
+        """Builds the index.
+
+        Args:
+            ranges: Iterable of (start_date, end_date) pairs.
+        """
+        self._starts = []
+        self._ends = []
+        for start_date, end_date in sorted(ranges):
+            self._append(start_date, end_date)
+
+    def _append(self, start_date, end_date):
+        if self._ends and start_date <= self._ends[-1]:
+            self._ends[-1] = max(self._ends[-1], end_date)
+        else:
+            self._starts.append(start_date)
+            self._ends.append(end_date)
+
+    def add(self, start_date, end_date):
+        """Adds a date range, merging it with the ranges it overlaps."""
+        first = bisect_left(self._ends, start_date)
+        last = bisect_right(self._starts, end_date)
+        if first < last:
+            start_date = min(start_date, self._starts[first])
+            end_date = max(end_date, self._ends[last - 1])
+        self._starts[first:last] = [start_date]
+        self._ends[first:last] = [end_date]
+
+    def contains(self, date):
+        """Returns True if the date is inside a finished session."""
+        position = bisect_right(self._starts, date) - 1
+        return position >= 0 and date <= self._ends[position]
+
+    def __len__(self):
+        return len(self._starts)
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+import unittest
+from database_connection import (
+    ConnectionPool, ConnectionPoolExhaustedError, configure_connection, connect,
+    get_profile_pragmas
+)
+
+
+class TestDatabaseConnection(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self._temp_dir.name, "test.sqlite")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_get_profile_pragmas_with_overrides(self):
+        pragmas = get_profile_pragmas("wal", overrides={"cache_size": -2000})
+
+        self.assertEqual(pragmas["journal_mode"], "WAL")
+        self.assertEqual(pragmas["cache_size"], -2000)
+
+    def test_get_profile_pragmas_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile_pragmas("turbo", overrides={})
+
+    def test_connect_applies_profile(self):
+        connection = connect(self.database, get_profile_pragmas("wal", overrides={}))
+        effective = configure_connection(connection, {})
+        connection.close()
+
+        self.assertEqual(effective["journal_mode"], "wal")
+        self.assertEqual(effective["busy_timeout"], 5000)
+        self.assertEqual(effective["temp_store"], 2)
+
+    def test_configure_connection_rejects_invalid_values(self):
+        connection = connect(self.database, {})
+
+        with self.assertRaises(ValueError):
+            configure_connection(connection, {"cache_size": "1; DROP TABLE users"})
+        with self.assertRaises(ValueError):
+            configure_connection(connection, {"foreign_keys": "ON"})
+        connection.close()
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(
+            os.path.join(self._temp_dir.name, "test.sqlite"), max_size=2, timeout=0.1)
+
+    def tearDown(self):
+        self.pool.close_all()
+        self._temp_dir.cleanup()
+
+    def _connection_in_thread(self, release=False):
+        result = {}
+
+        def run():
+            try:
+                result["connection"] = self.pool.get_connection()
+                if release:
+                    self.pool.release()
+            except ConnectionPoolExhaustedError as error:
+                result["error"] = error
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return result
+
+    def test_same_thread_gets_same_connection(self):
+        self.assertIs(self.pool.get_connection(), self.pool.get_connection())
+        self.assertEqual(self.pool.size, 1)
+
+    def test_threads_get_own_connections(self):
+        connection = self.pool.get_connection()
+        result = self._connection_in_thread(release=True)
+
+        self.assertIsNot(result["connection"], connection)
+        self.assertEqual(self.pool.size, 1)
+
+    def test_pool_size_is_bounded(self):
+        self.pool.get_connection()
+        hold = threading.Event()
+        done = threading.Event()
+
+        def hold_connection():
+            self.pool.get_connection()
+            hold.set()
+            done.wait()
+            self.pool.release()
+
+        thread = threading.Thread(target=hold_connection)
+        thread.start()
+        hold.wait()
+
+        result = self._connection_in_thread()
+        done.set()
+        thread.join()
+
+        self.assertIsInstance(result["error"], ConnectionPoolExhaustedError)
+
+    def test_connections_of_exited_threads_are_reclaimed(self):
+        self._connection_in_thread()
+        self._connection_in_thread()
+
+        result = self._connection_in_thread()
+
+        self.assertIn("connection", result)
+        self.assertEqual(self.pool.size, 1)
+
+    def test_broken_connection_is_replaced(self):
+        pool = ConnectionPool(
+            os.path.join(self._temp_dir.name, "other.sqlite"), max_size=1,
+            timeout=0.1, health_check_interval=0)
+        connection = pool.get_connection()
+        connection.close()
+
+        new_connection = pool.get_connection()
+
+        self.assertIsNot(new_connection, connection)
+        self.assertEqual(new_connection.execute("SELECT 1").fetchone()[0], 1)
+        pool.close_all()
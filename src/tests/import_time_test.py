@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# Import times are compared with importing logging and sqlite3, which the
+# application needs anyway, so the limits scale with the speed of the
+# machine. The ratios are generous: the point is to notice when importing
+# starts doing real work again, not to measure small differences.
+REFERENCE_MODULES = ("logging", "sqlite3")
+SERVICE_IMPORT_RATIO = 6
+INDEX_IMPORT_RATIO = 8
+
+# Each time is the fastest of a few runs to leave out scheduling noise
+IMPORT_TIME_RUNS = 3
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=SRC_DIR, capture_output=True,
+        text=True, check=True)
+
+
+def cumulative_import_time(*modules):
+    """Returns the cumulative import time of modules in microseconds.
+
+    The modules are imported in a new interpreter and the fastest of
+    IMPORT_TIME_RUNS runs is returned.
+    """
+    return min(_run_import_time(modules) for _ in range(IMPORT_TIME_RUNS))
+
+
+def _run_import_time(modules):
+    result = run_python("-X", "importtime", "-c", f"import {', '.join(modules)}")
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        # Modules imported directly have one space of indentation, and the
+        # header line has no number
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith("  "):
+            times[parts[2].strip()] = int(parts[1])
+    missing = [module for module in modules if module not in times]
+    if missing:
+        raise AssertionError(f"No import time reported for {', '.join(missing)}")
+    return sum(times[module] for module in modules)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_importing_service_opens_no_database(self):
+        result = run_python("-c", (
+            "import sqlite3\n"
+            "calls = []\n"
+            "connect = sqlite3.connect\n"
+            "sqlite3.connect = lambda *args, **kwargs: calls.append(args) or connect(*args, **kwargs)\n"
+            "import services.pef_service\n"
+            "print(len(calls))"
+        ))
+
+        self.assertEqual(result.stdout.strip(), "0")
+
+    def test_importing_service_does_not_import_numpy(self):
+        result = run_python("-c", (
+            "import sys\n"
+            "import services.pef_service\n"
+            "print('numpy' in sys.modules)"
+        ))
+
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_service_import_time(self):
+        reference = cumulative_import_time(*REFERENCE_MODULES)
+
+        self.assertLess(cumulative_import_time("services.pef_service"),
+                        reference * SERVICE_IMPORT_RATIO)
+
+    def test_index_import_time(self):
+        reference = cumulative_import_time(*REFERENCE_MODULES)
+
+        self.assertLess(cumulative_import_time("index"), reference * INDEX_IMPORT_RATIO)
+
+    def test_importing_index_does_not_import_tkcalendar(self):
+        result = run_python("-c", (
+            "import sys\n"
+            "import index\n"
+            "print('tkcalendar' in sys.modules)"
+        ))
+
+        self.assertEqual(result.stdout.strip(), "False")
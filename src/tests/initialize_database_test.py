@@ -0,0 +1,110 @@
+import sqlite3
+import unittest
+from entities.pef_monitoring import BEFORE_MEDICATION, EVENING, MORNING
+from initialize_database import MIGRATIONS, migrate, get_schema_version
+from repositories.pef_monitorin_repository import MONITORING_COLUMNS, SESSION_COLUMNS
+
+
+def table_names(connection):
+    rows = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    return {row[0] for row in rows}
+
+
+class TestMigrate(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_migrate_empty_database(self):
+        version = migrate(self.connection)
+
+        self.assertEqual(version, len(MIGRATIONS))
+        self.assertEqual(get_schema_version(self.connection), len(MIGRATIONS))
+        self.assertTrue({"users", "Pef_monitoring", "MonitoringSession",
+                         "pef_reference"} <= table_names(self.connection))
+
+    def test_migrate_again_does_nothing(self):
+        migrate(self.connection)
+        self.connection.execute(
+            "INSERT INTO users (username, password) VALUES ('Eva', 'Eva321')")
+        self.connection.commit()
+
+        migrate(self.connection)
+
+        rows = self.connection.execute("SELECT username FROM users").fetchall()
+        self.assertEqual(rows, [("Eva",)])
+
+    def test_migrate_upgrades_in_place(self):
+        migrate(self.connection, MIGRATIONS[:1])
+        self.connection.execute(
+            "INSERT INTO users (username, password) VALUES ('Eva', 'Eva321')")
+        self.connection.commit()
+
+        version = migrate(self.connection)
+
+        self.assertEqual(version, len(MIGRATIONS))
+        self.assertIn("pef_reference", table_names(self.connection))
+        rows = self.connection.execute("SELECT username FROM users").fetchall()
+        self.assertEqual(rows, [("Eva",)])
+
+    def _add_daily_measurements(self):
+        self.connection.executemany("""
+            INSERT INTO Pef_monitoring (username, date, value1, value2, value3, state, time)
+            VALUES ('Eva', ?, ?, ?, ?, ?, ?)""",
+            [("2025-04-01", 400, 410, 420, BEFORE_MEDICATION, MORNING),
+             ("2025-04-01", 300, 310, 320, BEFORE_MEDICATION, EVENING),
+             ("2025-04-02", 500, 510, 520, BEFORE_MEDICATION, MORNING)])
+        self.connection.commit()
+
+    def _daily_values(self):
+        return self.connection.execute(
+            "SELECT date, max_m, max_e, row_count FROM pef_daily ORDER BY date").fetchall()
+
+    def test_migrate_fills_daily_values(self):
+        migrate(self.connection, MIGRATIONS[:5])
+        self._add_daily_measurements()
+
+        migrate(self.connection)
+
+        self.assertEqual(self._daily_values(),
+                         [("2025-04-01", 420, 320, 2), ("2025-04-02", 520, None, 1)])
+
+    def test_migrate_refills_empty_daily_slots(self):
+        migrate(self.connection, MIGRATIONS[:6])
+        self._add_daily_measurements()
+        # Version 6 left the slot maxima of stored measurements empty
+        self.connection.execute("UPDATE pef_daily SET max_m = NULL, max_e = NULL")
+        self.connection.commit()
+
+        migrate(self.connection)
+
+        self.assertEqual(self._daily_values(),
+                         [("2025-04-01", 420, 320, 2), ("2025-04-02", 520, None, 1)])
+
+    def test_monitoring_queries_use_covering_indexes(self):
+        migrate(self.connection)
+        queries = [
+            f"SELECT {MONITORING_COLUMNS} FROM Pef_monitoring "
+            "WHERE username = 'Eva' AND date BETWEEN '2025-04-01' AND '2025-04-14'",
+            f"SELECT {SESSION_COLUMNS} FROM MonitoringSession "
+            "WHERE username = 'Eva' ORDER BY start_date DESC",
+        ]
+
+        for query in queries:
+            plan = self.connection.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+            self.assertIn("USING COVERING INDEX", plan[0][3])
+
+    def test_failing_step_is_rolled_back(self):
+        migrations = MIGRATIONS[:1] + [[
+            "create table extra (id integer)",
+            "create index broken on missing_table (id)",
+        ]]
+
+        with self.assertRaises(sqlite3.OperationalError):
+            migrate(self.connection, migrations)
+
+        self.assertEqual(get_schema_version(self.connection), 1)
+        self.assertNotIn("extra", table_names(self.connection))
@@ -1,4 +1,6 @@
+import sqlite3
 import unittest
+from unittest.mock import patch
 from repositories.pef_monitorin_repository import pef_monitoring_repository
 from entities.pef_monitoring import PefMonitoring
 
@@ -6,6 +8,7 @@ from entities.pef_monitoring import PefMonitoring
 class TestPefMonitoringRepository(unittest.TestCase):
     def setUp(self):
         pef_monitoring_repository.delete_all_monitoring()
+        pef_monitoring_repository.delete_all_sessions()
 
         self.monitoring_entry = PefMonitoring(
             username='Eva',
@@ -52,3 +55,193 @@ class TestPefMonitoringRepository(unittest.TestCase):
         results = pef_monitoring_repository.find_monitoring_by_username('Eva')
 
         self.assertEqual(results, [])
+
+    def test_add_values(self):
+        entries = [
+            PefMonitoring('Eva', f'2025-04-{day:02d}', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU')
+            for day in range(1, 8)
+        ]
+        entries.insert(2, PefMonitoring('Eva', '2025-04-08', 'abc', 410, 420,
+                                        'ENNEN LÄÄKETTÄ', 'AAMU'))
+        entries.append(PefMonitoring('Eva', '', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+        entries.append(PefMonitoring('Eva', '2025-04-01', 300, 310, 320, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+
+        with patch.object(pef_monitoring_repository, '_insert_batch',
+                          wraps=pef_monitoring_repository._insert_batch) as mock_insert:
+            counts = pef_monitoring_repository.add_values(iter(entries), batch_size=3)
+
+        self.assertEqual(counts, {'inserted': 7, 'rejected': 3})
+        self.assertEqual(mock_insert.call_count, 3)
+        results = pef_monitoring_repository.find_monitoring_by_username('Eva')
+        self.assertEqual(len(results), 7)
+
+    def test_iter_monitoring_by_username(self):
+        for date, time in [('2025-04-13', 'ILTA'), ('2025-04-11', 'AAMU'),
+                           ('2025-04-13', 'AAMU'), ('2025-04-12', 'AAMU')]:
+            pef_monitoring_repository.add_value(
+                PefMonitoring('Eva', date, 400, 410, 420, 'ENNEN LÄÄKETTÄ', time))
+        pef_monitoring_repository.add_value(
+            PefMonitoring('Eino', '2025-04-01', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+
+        rows = pef_monitoring_repository.iter_monitoring_by_username('Eva')
+        since = pef_monitoring_repository.iter_monitoring_by_username(
+            'Eva', since='2025-04-12', limit=2)
+
+        self.assertEqual(next(rows)['date'], '2025-04-11')
+        self.assertEqual([(row['date'], row['time']) for row in rows],
+                         [('2025-04-12', 'AAMU'), ('2025-04-13', 'AAMU'),
+                          ('2025-04-13', 'ILTA')])
+        self.assertEqual([(row['date'], row['time']) for row in since],
+                         [('2025-04-12', 'AAMU'), ('2025-04-13', 'AAMU')])
+
+    def test_find_monitoring_page(self):
+        for day, time in [(3, 'AAMU'), (1, 'AAMU'), (2, 'AAMU'), (2, 'ILTA'), (4, 'AAMU')]:
+            pef_monitoring_repository.add_value(
+                PefMonitoring('Eva', f'2025-04-0{day}', 400, 410, 420, 'ENNEN LÄÄKETTÄ', time))
+
+        pages = []
+        after = None
+        while True:
+            page = pef_monitoring_repository.find_monitoring_page('Eva', after, page_size=2)
+            if not page:
+                break
+            pages.append([row['date'] for row in page])
+            after = (page[-1]['date'], page[-1]['id'])
+
+        self.assertEqual(pages, [['2025-04-01', '2025-04-02'],
+                                 ['2025-04-02', '2025-04-03'], ['2025-04-04']])
+
+    def test_get_sessions_page(self):
+        for start_date in ['2025-01-01', '2025-03-01', '2025-02-01', '2025-03-01']:
+            pef_monitoring_repository.create_monitoring_session('Eva', start_date, '2025-04-01')
+
+        first = pef_monitoring_repository.get_sessions_page('Eva', page_size=3)
+        second = pef_monitoring_repository.get_sessions_page(
+            'Eva', after=(first[-1]['start_date'], first[-1]['id']), page_size=3)
+
+        self.assertEqual([row['start_date'] for row in first],
+                         ['2025-03-01', '2025-03-01', '2025-02-01'])
+        self.assertGreater(first[0]['id'], first[1]['id'])
+        self.assertEqual([row['start_date'] for row in second], ['2025-01-01'])
+
+    def test_add_value_conflicts(self):
+        entry = self.monitoring_entry
+        duplicate = PefMonitoring('Eva', entry.date, 300, 310, 320, entry.state, entry.time)
+        stored_id = pef_monitoring_repository.add_value(self.monitoring_entry)
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            pef_monitoring_repository.add_value(duplicate)
+        ignored_id = pef_monitoring_repository.add_value(duplicate, on_conflict='ignore')
+        kept = pef_monitoring_repository.find_monitoring_by_username('Eva')
+        replaced_id = pef_monitoring_repository.add_value(duplicate, on_conflict='replace')
+        replaced = pef_monitoring_repository.find_monitoring_by_username('Eva')
+
+        self.assertIsNone(ignored_id)
+        self.assertEqual([row['value1'] for row in kept], [400])
+        self.assertEqual(replaced_id, stored_id)
+        self.assertEqual([row['value1'] for row in replaced], [300])
+
+    def test_find_unfinished_monitoring(self):
+        for day in [1, 3, 5, 7]:
+            pef_monitoring_repository.add_value(
+                PefMonitoring('Eva', f'2025-04-0{day}', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+        pef_monitoring_repository.add_value(
+            PefMonitoring('Eino', '2025-04-02', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+        pef_monitoring_repository.create_monitoring_session('Eva', '2025-04-01', '2025-04-03')
+        pef_monitoring_repository.create_monitoring_session('Eino', '2025-04-05', '2025-04-06')
+
+        rows = pef_monitoring_repository.find_unfinished_monitoring('Eva')
+
+        self.assertEqual([row['date'] for row in rows], ['2025-04-05', '2025-04-07'])
+
+    def test_stored_session_summary_is_invalidated_by_measurements(self):
+        summary = {"over_20": 1, "over_15": 2, "highest": 420, "lowest": 400,
+                   "average": 410.5, "warning_message": "Viesti"}
+        pef_monitoring_repository.create_monitoring_session('Eva', '2025-04-10', '2025-04-20')
+        pef_monitoring_repository.store_session_summary(
+            'Eva', '2025-04-10', '2025-04-20', summary, 1)
+
+        stored = pef_monitoring_repository.get_stored_session_summary(
+            'Eva', '2025-04-10', '2025-04-20')
+        pef_monitoring_repository.add_value(
+            PefMonitoring('Eva', '2025-04-21', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+        after_outside = pef_monitoring_repository.get_stored_session_summary(
+            'Eva', '2025-04-10', '2025-04-20')
+        pef_monitoring_repository.add_value(self.monitoring_entry)
+        after_inside = pef_monitoring_repository.get_stored_session_summary(
+            'Eva', '2025-04-10', '2025-04-20')
+
+        self.assertEqual({key: stored[key] for key in summary}, summary)
+        self.assertEqual(stored['summary_version'], 1)
+        self.assertEqual(after_outside['summary_version'], 1)
+        self.assertIsNone(after_inside['summary_version'])
+        self.assertIsNone(pef_monitoring_repository.get_stored_session_summary(
+            'Eva', '2025-01-01', '2025-01-02'))
+
+    def test_daily_values_follow_measurements(self):
+        for state, time, value in [('ENNEN LÄÄKETTÄ', 'AAMU', 400),
+                                   ('LÄÄKKEEN JÄLKEEN', 'AAMU', 480),
+                                   ('ENNEN LÄÄKETTÄ', 'ILTA', 300)]:
+            pef_monitoring_repository.add_value(
+                PefMonitoring('Eva', '2025-04-01', value - 20, value - 10, value, state, time))
+        pef_monitoring_repository.add_value(
+            PefMonitoring('Eva', '2025-04-02', 500, 500, 500, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+        pef_monitoring_repository.add_value(
+            PefMonitoring('Eva', '2025-04-01', 200, 210, 220, 'ENNEN LÄÄKETTÄ', 'ILTA'),
+            on_conflict='replace')
+
+        days = pef_monitoring_repository.get_daily_values('Eva', '2025-04-01', '2025-04-30')
+        first_day = days[0]
+
+        self.assertEqual([day['date'] for day in days], ['2025-04-01', '2025-04-02'])
+        self.assertEqual(
+            (first_day['max_m'], first_day['max_m_p'], first_day['max_e'], first_day['max_e_p']),
+            (400, 480, 220, None))
+        self.assertEqual(
+            (first_day['highest'], first_day['lowest'], first_day['total'],
+             first_day['row_count']),
+            (480, 220, 1100, 3))
+
+        pef_monitoring_repository.delete_all_monitoring()
+
+        self.assertEqual(
+            pef_monitoring_repository.get_daily_values('Eva', '2025-04-01', '2025-04-30'), [])
+
+    def test_count_measurements_by_date(self):
+        for date, state, time in [('2025-03-31', 'ENNEN LÄÄKETTÄ', 'AAMU'),
+                                  ('2025-04-01', 'ENNEN LÄÄKETTÄ', 'AAMU'),
+                                  ('2025-04-01', 'LÄÄKKEEN JÄLKEEN', 'AAMU'),
+                                  ('2025-04-01', 'ENNEN LÄÄKETTÄ', 'ILTA'),
+                                  ('2025-04-30', 'ENNEN LÄÄKETTÄ', 'AAMU')]:
+            pef_monitoring_repository.add_value(
+                PefMonitoring('Eva', date, 400, 410, 420, state, time))
+        pef_monitoring_repository.add_value(
+            PefMonitoring('Eino', '2025-04-02', 400, 410, 420, 'ENNEN LÄÄKETTÄ', 'AAMU'))
+
+        counts = pef_monitoring_repository.count_measurements_by_date(
+            'Eva', '2025-04-01', '2025-04-30')
+
+        self.assertEqual(counts, {'2025-04-01': 3, '2025-04-30': 1})
+
+    def test_find_unfinished_monitoring_page(self):
+        for day, time in [(3, 'AAMU'), (1, 'ILTA'), (2, 'AAMU'), (1, 'AAMU'), (5, 'AAMU')]:
+            pef_monitoring_repository.add_value(
+                PefMonitoring('Eva', f'2025-04-0{day}', 400, 410, 420, 'ENNEN LÄÄKETTÄ', time))
+        pef_monitoring_repository.create_monitoring_session('Eva', '2025-04-02', '2025-04-02')
+
+        pages = []
+        after = None
+        while True:
+            page = pef_monitoring_repository.find_unfinished_monitoring_page(
+                'Eva', after, page_size=2)
+            if not page:
+                break
+            pages.append([(row['date'], row['time']) for row in page])
+            after = (page[-1]['date'], page[-1]['time'], page[-1]['id'])
+        span = pef_monitoring_repository.get_unfinished_monitoring_span('Eva')
+
+        self.assertEqual(pages, [[('2025-04-01', 'AAMU'), ('2025-04-01', 'ILTA')],
+                                 [('2025-04-03', 'AAMU'), ('2025-04-05', 'AAMU')]])
+        self.assertEqual(tuple(span), (4, '2025-04-01', '2025-04-05'))
+        self.assertEqual(pef_monitoring_repository.count_sessions('Eva'), 1)
+        self.assertEqual(pef_monitoring_repository.count_sessions('Eino'), 0)
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from repositories.pef_reference_repository import pef_reference_repository
+from repositories.user_repository import user_repository
+from database_connection import get_database_connection
+from migrate_pef_file import migrate_pef_file
+from entities.pef import Pef
+from entities.user import User
+
+
+class TestPefReferenceRepository(unittest.TestCase):
+    def setUp(self):
+        pef_reference_repository.delete_all()
+        user_repository.delete_all()
+        self.user_eva = user_repository.create(User('Eva', 'Eva321'))
+        self.user_eino = user_repository.create(User('Eino', 'Eino456'))
+
+    def test_create(self):
+        saved = pef_reference_repository.create(Pef(value=500, user=self.user_eva))
+        pefs = pef_reference_repository.find_all()
+
+        self.assertIsNotNone(saved.created_at)
+        self.assertEqual(len(pefs), 1)
+        self.assertEqual(pefs[0].pef_id, saved.pef_id)
+        self.assertEqual(pefs[0].value, 500)
+        self.assertEqual(pefs[0].user.username, 'Eva')
+
+    def test_get_latest_for_user(self):
+        pef_reference_repository.create(Pef(value=500, user=self.user_eva))
+        pef_reference_repository.create(Pef(value=450, user=self.user_eino))
+        pef_reference_repository.create(Pef(value=520, user=self.user_eva))
+
+        pefs = pef_reference_repository.get_latest_for_user('Eva')
+
+        self.assertEqual([pef.value for pef in pefs], [500, 520])
+        self.assertEqual(pef_reference_repository.find_by_user(self.user_eino)[0].value, 450)
+        self.assertEqual(pef_reference_repository.get_latest_for_user('Nobody'), [])
+
+
+class TestMigratePefFile(unittest.TestCase):
+    def setUp(self):
+        pef_reference_repository.delete_all()
+        user_repository.delete_all()
+        user_repository.create(User('Eva', 'Eva321'))
+
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self._temp_dir.name, 'pef.csv')
+        with open(self.file_path, 'w', encoding='utf-8') as file:
+            file.write('1;500.0;Eva\n\n2;400.5;Eva\n3;450.0;Eino\n4;300.0;\n5;520.0;Eva\n')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_migrate_in_batches(self):
+        imported = migrate_pef_file(
+            get_database_connection(), self.file_path, batch_size=2)
+
+        self.assertEqual(imported, 5)
+        self.assertEqual(len(pef_reference_repository.find_all()), 5)
+        self.assertEqual(
+            [pef.pef_id for pef in pef_reference_repository.get_latest_for_user('Eva')],
+            ['1', '2', '5'])
+
+    def test_migrate_keeps_file_order_before_new_references(self):
+        migrate_pef_file(get_database_connection(), self.file_path)
+        pef_reference_repository.create(Pef(value=530, user=User('Eva', 'Eva321')))
+
+        pefs = pef_reference_repository.get_latest_for_user('Eva')
+
+        self.assertEqual([pef.value for pef in pefs], [500.0, 400.5, 520.0, 530])
+        self.assertEqual([pef.created_at for pef in pefs[:3]],
+                         ['1970-01-01T00:00:00.000000', '1970-01-01T00:00:00.000002',
+                          '1970-01-01T00:00:00.000005'])
+
+    def test_migrate_again_skips_existing(self):
+        migrate_pef_file(get_database_connection(), self.file_path)
+        imported = migrate_pef_file(get_database_connection(), self.file_path)
+
+        self.assertEqual(imported, 0)
+        self.assertEqual(len(pef_reference_repository.find_all()), 5)
+
+    def test_migrate_creates_schema_of_new_database(self):
+        connection = sqlite3.connect(':memory:')
+
+        imported = migrate_pef_file(connection, self.file_path)
+
+        self.assertEqual(imported, 5)
+        self.assertEqual(
+            connection.execute('select count(*) from pef_reference').fetchone()[0], 5)
+        connection.close()
+
+    def test_migrate_missing_file(self):
+        imported = migrate_pef_file(
+            get_database_connection(), os.path.join(self._temp_dir.name, 'missing.csv'))
+
+        self.assertEqual(imported, 0)
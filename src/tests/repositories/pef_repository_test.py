@@ -1,38 +1,107 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 from repositories.pef_repository import PefRepository
+from repositories.user_repository import user_repository
 from entities.pef import Pef
+from entities.user import User
 
 
 class TestPefRepository(unittest.TestCase):
     def setUp(self):
-        # Create a mock user directly for testing
-        class MockUser:
-            def __init__(self, username):
-                self.username = username
+        user_repository.delete_all()
+        self.user_eva = user_repository.create(User("Eva", "Eva321"))
+        self.user_eino = user_repository.create(User("Eino", "Eino456"))
 
-        # Manually creating a mock user "Eva"
-        self.user_eva = MockUser("Eva")
+        # Each test gets its own log file
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self._temp_dir.name, "pef.csv")
+        self.pef_repository = PefRepository(self.file_path)
 
-        # Create a Pef object for the test
-        self.pef_eva = Pef(value=500, user=self.user_eva)
+    def tearDown(self):
+        self._temp_dir.cleanup()
 
-        # Initialize the repository with a mock file path
-        self.pef_repository = PefRepository("mock_pef_file.txt")
+    def _read_rows(self):
+        with open(self.file_path, encoding="utf-8") as file:
+            return [row.strip() for row in file]
 
     def test_create(self):
-        # Test the create method to save a new PEF reference for a user
         new_pef = Pef(value=600, user=self.user_eva)
 
-        # Mock the file read operation to simulate the file content
-        with patch("builtins.open", new_callable=mock_open, read_data="1;500;Eva\n"):
-            # Mock the _write method to prevent actual file writing
-            with patch.object(self.pef_repository, "_write", return_value=None) as mock_write:
-                saved_pefs = self.pef_repository.create(new_pef)
+        saved_pef = self.pef_repository.create(new_pef)
 
-                # Assert that the new PEF is added to the list
-                self.assertEqual(saved_pefs[-1].value, 600)
-                self.assertEqual(saved_pefs[-1].user.username, "Eva")
+        self.assertEqual(saved_pef.value, 600)
+        self.assertEqual(saved_pef.user.username, "Eva")
+        self.assertEqual(self._read_rows(), [f"{new_pef.pef_id};600;Eva"])
 
-                # Ensure that the _write method is called
-                mock_write.assert_called_once()
+    def test_create_appends_without_rewriting(self):
+        self.pef_repository.create(Pef(value=500, user=self.user_eva))
+
+        with patch("builtins.open", wraps=open) as mock_file:
+            self.pef_repository.create(Pef(value=600, user=self.user_eva))
+
+        mock_file.assert_called_once_with(self.file_path, "a", encoding="utf-8")
+        self.assertEqual(len(self._read_rows()), 2)
+
+    def test_get_latest_for_user(self):
+        self.pef_repository.create(Pef(value=500, user=self.user_eva))
+        self.pef_repository.create(Pef(value=450, user=self.user_eino))
+        self.pef_repository.create(Pef(value=520, user=self.user_eva))
+
+        pefs = self.pef_repository.get_latest_for_user("Eva")
+
+        self.assertEqual([pef.value for pef in pefs], [500, 520])
+        self.assertEqual(self.pef_repository.find_by_user(self.user_eino)[0].value, 450)
+        self.assertEqual(self.pef_repository.get_latest_for_user("Nobody"), [])
+
+    def test_log_is_loaded_once(self):
+        self.pef_repository.create(Pef(value=500, user=self.user_eva))
+        reloaded = PefRepository(self.file_path)
+
+        with patch.object(reloaded, "_read", wraps=reloaded._read) as mock_read:
+            reloaded.get_latest_for_user("Eva")
+            reloaded.find_all()
+            reloaded.create(Pef(value=510, user=self.user_eva))
+            pefs = reloaded.get_latest_for_user("Eva")
+
+        mock_read.assert_called_once()
+        self.assertEqual([pef.value for pef in pefs], [500, 510])
+
+    def test_read_resolves_users_in_bulk(self):
+        self.pef_repository.create(Pef(value=500, user=self.user_eva))
+        self.pef_repository.create(Pef(value=450, user=self.user_eino))
+        self.pef_repository.create(Pef(value=520, user=self.user_eva))
+        reloaded = PefRepository(self.file_path)
+
+        with patch.object(user_repository, "find_by_username") as mock_find, \
+                patch.object(user_repository, "find_by_usernames",
+                             wraps=user_repository.find_by_usernames) as mock_find_many:
+            pefs = reloaded.get_latest_for_user("Eva")
+
+        mock_find.assert_not_called()
+        mock_find_many.assert_called_once()
+        self.assertEqual(len(pefs), 2)
+        self.assertIs(pefs[0].user, pefs[1].user)
+
+    def test_read_keeps_references_without_known_owner(self):
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write("1;500.0;Eva\n2;400.0;Nobody\n3;300.0;\n")
+
+        pefs = self.pef_repository.find_all()
+
+        self.assertEqual([pef.pef_id for pef in pefs], ["1", "2", "3"])
+        self.assertEqual(pefs[0].user.username, "Eva")
+        self.assertIsNone(pefs[1].user)
+        self.assertIsNone(pefs[2].user)
+
+    def test_compact(self):
+        pef = Pef(value=500, user=self.user_eva, pef_id="1")
+        self.pef_repository.create(pef)
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write("\n2;400.0;Eino\n\n1;500;Eva\n")
+
+        self.pef_repository.compact()
+
+        self.assertEqual(self._read_rows(), ["1;500;Eva", "2;400.0;Eino"])
+        self.assertEqual(len(self.pef_repository.find_all()), 2)
@@ -15,3 +15,12 @@ class TestUserRepository(unittest.TestCase):
 
         self.assertEqual(len(users), 1)
         self.assertEqual(str(users[0]), str(self.user_eva))
+
+    def test_find_by_usernames(self):
+        user_repository.create(self.user_eva)
+        user_repository.create(self.user_eino)
+
+        users = user_repository.find_by_usernames(['Eva', 'Eino', 'Eva', 'Nobody'])
+
+        self.assertEqual(sorted(users), ['Eino', 'Eva'])
+        self.assertEqual(users['Eva'].password, 'Eva321')
@@ -0,0 +1,76 @@
+import random
+import unittest
+from services.downsampling import DownsampledSeries, largest_triangle_three_buckets
+
+
+def random_walk(count, seed=20250404):
+    rng = random.Random(seed)
+    value = 400
+    points = []
+    for x in range(count):
+        value = min(max(value + rng.randint(-15, 15), 100), 700)
+        points.append((x / 2, value))
+    return points
+
+
+class TestLargestTriangleThreeBuckets(unittest.TestCase):
+    def test_short_series_is_returned_as_is(self):
+        points = [(0, 400), (1, 410), (2, 390)]
+
+        self.assertEqual(largest_triangle_three_buckets(points, 10), points)
+
+    def test_keeps_ends_and_threshold(self):
+        points = random_walk(1000)
+
+        sampled = largest_triangle_three_buckets(points, 100)
+
+        self.assertEqual(len(sampled), 100)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertEqual(sampled, sorted(sampled))
+        self.assertTrue(set(sampled) <= set(points))
+
+    def test_keeps_a_single_dip(self):
+        points = [(x, 400) for x in range(500)]
+        points[321] = (321, 150)
+
+        sampled = largest_triangle_three_buckets(points, 20)
+
+        self.assertIn((321, 150), sampled)
+
+    def test_threshold_below_three(self):
+        with self.assertRaises(ValueError):
+            largest_triangle_three_buckets(random_walk(10), 2)
+
+
+class TestDownsampledSeries(unittest.TestCase):
+    def test_bounds(self):
+        series = DownsampledSeries([(1, 400), (2, 350), (3, 420)])
+
+        self.assertEqual(len(series), 3)
+        self.assertEqual(series.bounds(), (1, 3, 350, 420))
+        self.assertIsNone(DownsampledSeries([]).bounds())
+
+    def test_window_of_small_series_includes_neighbours(self):
+        points = random_walk(100)
+        series = DownsampledSeries(points)
+
+        window = series.window(10, 20, 600)
+
+        self.assertEqual(window, points[19:42])
+
+    def test_window_is_limited_to_threshold(self):
+        points = random_walk(20000)
+        series = DownsampledSeries(points, window_limit=1000)
+
+        whole = series.window(0, 10000, 300)
+        part = series.window(2000, 2100, 300)
+
+        self.assertEqual(len(whole), 300)
+        self.assertEqual(whole[0], points[0])
+        self.assertEqual(whole[-1], points[-1])
+        self.assertLessEqual(len(part), 300)
+        self.assertLessEqual(part[0][0], 2000)
+        self.assertGreaterEqual(part[-1][0], 2100)
+        # Zoomed in far enough, the window is drawn from the measurements
+        self.assertTrue(set(part) <= set(points))
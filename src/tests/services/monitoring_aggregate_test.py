@@ -0,0 +1,150 @@
+import random
+import threading
+import unittest
+from datetime import date
+from unittest.mock import patch
+from database_connection import connection_pool
+from entities.pef_monitoring import BEFORE_MEDICATION, MORNING, PefMonitoring
+from repositories.pef_monitorin_repository import pef_monitoring_repository
+from services.pef_service import SUMMARY_RULES_VERSION, PefService
+from tests.services.monitoring_fixtures import SLOTS, random_measurements
+
+
+class TestMonitoringAggregates(unittest.TestCase):
+    def setUp(self):
+        pef_monitoring_repository.delete_all_monitoring()
+        pef_monitoring_repository.delete_all_sessions()
+        self.pef_service = PefService(pef_monitoring_repository=pef_monitoring_repository)
+        self.rng = random.Random(20250403)
+
+    def _add_random_values(self, days):
+        # Two rounds in random order, so that later values replace earlier ones
+        measurements = [
+            pef for _ in range(2)
+            for pef in random_measurements(self.rng, "Eva", date(2025, 4, 1), days)]
+        self.rng.shuffle(measurements)
+        for pef in measurements:
+            self.pef_service.add_value_to_monitoring(
+                pef.date, "Eva", str(pef.value1), str(pef.value2), str(pef.value3),
+                pef.state, pef.time, replace=True)
+
+    def test_unfinished_summary_follows_added_values(self):
+        self.pef_service.get_unfinished_monitoring_summary("Eva")
+
+        self._add_random_values(20)
+
+        self.assertEqual(
+            self.pef_service.get_unfinished_monitoring_summary("Eva"),
+            self.pef_service.calculate_monitoring_difference_for_session(
+                "Eva", "2025-04-01", "2025-04-30"))
+        self.assertEqual(self.pef_service.check_monitoring_aggregates(), [])
+
+    def test_aggregates_follow_values_added_from_threads(self):
+        self.pef_service.get_unfinished_monitoring_summary("Eva")
+        self.pef_service.create_monitoring_session("Eva", "2025-04-01", "2025-04-10")
+        self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+
+        errors = []
+
+        def add_values(days):
+            try:
+                for day in days:
+                    for state, time in SLOTS[:4]:
+                        self.pef_service.add_value_to_monitoring(
+                            f"2025-04-{day:02d}", "Eva", 300 + day, 305, 310, state, time)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                errors.append(error)
+            finally:
+                connection_pool.release()
+
+        threads = [threading.Thread(target=add_values, args=(range(first, 21, 3),))
+                   for first in range(1, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.pef_service.check_monitoring_aggregates(), [])
+        self.assertEqual(
+            self.pef_service.get_unfinished_monitoring_summary("Eva"),
+            self.pef_service.calculate_monitoring_difference_for_session(
+                "Eva", "2025-04-11", "2025-04-30"))
+
+    def test_finish_monitoring_session(self):
+        self._add_random_values(10)
+        expected = self.pef_service.calculate_monitoring_difference_for_session(
+            "Eva", "2025-04-01", "2025-04-10")
+
+        summary = self.pef_service.finish_monitoring_session("Eva", "2025-04-01", "2025-04-10")
+        self.pef_service.add_value_to_monitoring(
+            "2025-04-12", "Eva", 400, 410, 420, BEFORE_MEDICATION, MORNING)
+
+        self.assertEqual(summary, expected)
+        self.assertEqual(self.pef_service.get_unfinished_monitoring_summary("Eva")["highest"],
+                         420)
+        self.assertEqual(self.pef_service.get_session_summary(
+            "Eva", "2025-04-01", "2025-04-10"), expected)
+
+    def test_session_summary_follows_added_values(self):
+        self.pef_service.create_monitoring_session("Eva", "2025-04-01", "2025-04-10")
+        self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+
+        self._add_random_values(10)
+
+        self.assertEqual(
+            self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-10"),
+            self.pef_service.calculate_monitoring_difference_for_session(
+                "Eva", "2025-04-01", "2025-04-10"))
+
+    def test_check_rebuilds_changed_aggregates(self):
+        self._add_random_values(5)
+        self.pef_service.get_unfinished_monitoring_summary("Eva")
+        self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-05")
+        pef_monitoring_repository.add_value(
+            PefMonitoring("Eva", "2025-04-03", 900, 905, 910, "ENNEN LÄÄKETTÄ", "ILTA"))
+
+        mismatched = self.pef_service.check_monitoring_aggregates()
+
+        self.assertEqual(mismatched, ["Eva", ("Eva", "2025-04-01", "2025-04-05")])
+        self.assertEqual(
+            self.pef_service.get_unfinished_monitoring_summary("Eva")["highest"], 910)
+        self.assertEqual(self.pef_service.check_monitoring_aggregates(), [])
+
+    def test_session_summary_is_stored(self):
+        self._add_random_values(10)
+        self.pef_service.create_monitoring_session("Eva", "2025-04-01", "2025-04-10")
+        expected = self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+        reopened = PefService(pef_monitoring_repository=pef_monitoring_repository)
+
+        with patch.object(pef_monitoring_repository, "get_pef_entries_for_session") as mock_read:
+            summary = reopened.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+
+        mock_read.assert_not_called()
+        self.assertEqual(summary, expected)
+
+    def test_stored_session_summary_is_recomputed_after_changes(self):
+        self._add_random_values(10)
+        self.pef_service.create_monitoring_session("Eva", "2025-04-01", "2025-04-10")
+        self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+        pef_monitoring_repository.add_value(
+            PefMonitoring("Eva", "2025-04-03", 900, 905, 910, "ENNEN LÄÄKETTÄ", "ILTA"))
+
+        summary = PefService(pef_monitoring_repository=pef_monitoring_repository
+                             ).get_session_summary("Eva", "2025-04-01", "2025-04-10")
+
+        self.assertEqual(summary["highest"], 910)
+
+    def test_stored_session_summary_of_older_rules_is_recomputed(self):
+        self._add_random_values(10)
+        self.pef_service.create_monitoring_session("Eva", "2025-04-01", "2025-04-10")
+        expected = self.pef_service.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+        reopened = PefService(pef_monitoring_repository=pef_monitoring_repository)
+
+        with patch("services.pef_service.SUMMARY_RULES_VERSION", SUMMARY_RULES_VERSION + 1):
+            summary = reopened.get_session_summary("Eva", "2025-04-01", "2025-04-10")
+        stored = pef_monitoring_repository.get_stored_session_summary(
+            "Eva", "2025-04-01", "2025-04-10")
+
+        self.assertEqual(summary, expected)
+        self.assertEqual(stored["summary_version"], SUMMARY_RULES_VERSION + 1)
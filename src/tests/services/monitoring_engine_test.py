@@ -0,0 +1,49 @@
+import random
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+from services import monitoring_engine
+from services.pef_service import PefService
+from tests.services.monitoring_fixtures import random_measurements
+
+
+def random_session(rng, day_count):
+    return [vars(pef) for pef in random_measurements(rng, "Eva", date(2025, 1, 1), day_count)]
+
+
+class TestMonitoringEngine(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(20250402)
+        self.sessions = [random_session(self.rng, self.rng.randint(0, 20)) for _ in range(60)]
+        self.sessions.append([])
+        self.pef_service = PefService(pef_monitoring_repository=MagicMock())
+
+    def _python_summary_data(self, pefs):
+        return self.pef_service._calculate_summary_data(
+            pefs, len(set(p["date"] for p in pefs)))
+
+    @unittest.skipUnless(monitoring_engine.is_available(), "NumPy is not installed")
+    def test_summarize_sessions_matches_python_engine(self):
+        actual = monitoring_engine.summarize_sessions(self.sessions)
+
+        self.assertEqual(actual, [self._python_summary_data(pefs) for pefs in self.sessions])
+
+    @unittest.skipUnless(monitoring_engine.is_available(), "NumPy is not installed")
+    def test_summarize_sessions_without_rows(self):
+        self.assertEqual(monitoring_engine.summarize_sessions([[], []]),
+                         [self._python_summary_data([])] * 2)
+
+    def test_sessions_fall_back_to_python_engine(self):
+        self.pef_service._pef_monitoring_repository.get_pef_entries_for_session.side_effect = \
+            self.sessions
+        sessions = [{"username": "Eva", "start_date": "2025-01-01", "end_date": "2025-01-31"}
+                    ] * len(self.sessions)
+
+        with patch.object(monitoring_engine, "is_available", return_value=False):
+            summaries = self.pef_service.calculate_monitoring_differences_for_sessions(sessions)
+
+        self.assertEqual(summaries, [
+            self.pef_service.calculate_monitoring_difference(
+                pefs, len(set(p["date"] for p in pefs)))
+            for pefs in self.sessions
+        ])
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from entities.pef_monitoring import (
+    AFTER_MEDICATION, BEFORE_MEDICATION, EVENING, MORNING, PefMonitoring
+)
+
+# The four measurement slots of a day, and one the summary rules do not know
+SLOTS = [
+    (BEFORE_MEDICATION, MORNING),
+    (AFTER_MEDICATION, MORNING),
+    (BEFORE_MEDICATION, EVENING),
+    (AFTER_MEDICATION, EVENING),
+    ("BEFORE MEDICATION", "MORNING"),
+]
+
+
+def random_measurements(rng, username, first_day, day_count):
+    """Yields random measurements in a random set of slots on every day.
+
+    Args:
+        rng: The random.Random instance to draw from.
+        username: Owner of the measurements.
+        first_day: Date of the first day.
+        day_count: Number of days.
+    """
+    for offset in range(day_count):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        for state, time in rng.sample(SLOTS, rng.randint(0, len(SLOTS))):
+            base = rng.randint(150, 650)
+            yield PefMonitoring(username, day, base, base + rng.randint(-20, 20),
+                                base + rng.randint(-20, 20), state, time)
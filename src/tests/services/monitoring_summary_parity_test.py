@@ -0,0 +1,36 @@
+import random
+import unittest
+from datetime import date, timedelta
+from repositories.pef_monitorin_repository import pef_monitoring_repository
+from services.pef_service import PefService
+from tests.services.monitoring_fixtures import random_measurements
+
+
+class TestMonitoringSummaryParity(unittest.TestCase):
+    def setUp(self):
+        pef_monitoring_repository.delete_all_monitoring()
+        self.pef_service = PefService(pef_monitoring_repository=pef_monitoring_repository)
+
+    def test_database_engine_matches_python_engine(self):
+        rng = random.Random(20250401)
+        first_day = date(2025, 1, 1)
+        for username in ("Eva", "Eino"):
+            pef_monitoring_repository.add_values(
+                random_measurements(rng, username, first_day, 120))
+
+        for _ in range(40):
+            start = first_day + timedelta(days=rng.randint(0, 130))
+            end = start + timedelta(days=rng.randint(0, 40))
+            arguments = ("Eva", start.isoformat(), end.isoformat())
+
+            expected = self.pef_service.calculate_monitoring_difference_for_session(*arguments)
+            actual = self.pef_service.calculate_monitoring_difference_in_database(*arguments)
+
+            self.assertEqual(actual, expected)
+
+    def test_empty_range(self):
+        arguments = ("Eva", "2025-01-01", "2025-01-31")
+
+        self.assertEqual(
+            self.pef_service.calculate_monitoring_difference_in_database(*arguments),
+            self.pef_service.calculate_monitoring_difference_for_session(*arguments))
@@ -1,9 +1,11 @@
 import unittest
+from datetime import date
 from unittest.mock import MagicMock, patch
 from entities.pef import Pef
 from entities.user import User
 from entities.pef_monitoring import PefMonitoring
-from services.pef_service import PefService, InvalidCredentialsError, UsernameExistsError, PasswordsDoNotMatch
+from services.pef_service import PefService, InvalidCredentialsError, UsernameExistsError, PasswordsDoNotMatch, DuplicateMeasurementError
+from services.pef_service import MONITORING_ADDED, MONITORING_IMPORTED, SESSION_CREATED
 
 
 class TestPefService(unittest.TestCase):
@@ -264,3 +266,197 @@ class TestPefService(unittest.TestCase):
         self.assertEqual(args.value3, value3)
         self.assertEqual(args.state, state)
         self.assertEqual(args.time, time)
+
+    def test_add_values_to_monitoring_bulk(self):
+        entries = [PefMonitoring("test_user", "2025-04-01", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU")]
+        self.mock_pef_monitoring_repository.add_values.return_value = {
+            "inserted": 1, "rejected": 0}
+
+        result = self.pef_service.add_values_to_monitoring_bulk(entries, batch_size=100)
+
+        self.assertEqual(result, {"inserted": 1, "rejected": 0})
+        self.mock_pef_monitoring_repository.add_values.assert_called_once_with(
+            entries, batch_size=100)
+
+    def test_get_monitoring_by_username(self):
+        self.pef_service._user = User("MockUser", "pass")
+        self.mock_pef_monitoring_repository.iter_monitoring_by_username.return_value = iter(
+            ["row1", "row2"])
+
+        result = self.pef_service.get_monitoring_by_username()
+
+        self.assertEqual(result, ["row1", "row2"])
+        self.mock_pef_monitoring_repository.iter_monitoring_by_username.assert_called_once_with(
+            "MockUser", since=None, limit=None)
+
+    def test_iter_monitoring_by_username_no_user(self):
+        self.pef_service._user = None
+
+        self.assertEqual(list(self.pef_service.iter_monitoring_by_username()), [])
+        self.assertIsNone(self.pef_service.get_monitoring_by_username())
+
+    def test_count_measurements_by_month(self):
+        self.mock_pef_monitoring_repository.count_measurements_by_date.return_value = {
+            "2024-02-29": 2}
+
+        counts = self.pef_service.count_measurements_by_month("test_user", 2024, 2)
+        self.pef_service.count_measurements_by_month("test_user", 2024, 2)
+
+        self.assertEqual(counts, {"2024-02-29": 2})
+        self.mock_pef_monitoring_repository.count_measurements_by_date.assert_called_once_with(
+            "test_user", "2024-02-01", "2024-02-29")
+
+    def test_get_pef_trend(self):
+        self.pef_service._user = User("MockUser", "pass")
+        self.mock_pef_monitoring_repository.iter_monitoring_by_username.return_value = iter([
+            {"date": "2025-04-01", "value1": 300, "value2": 320, "value3": 310,
+             "state": "ENNEN LÄÄKETTÄ", "time": "ILTA"},
+            {"date": "2025-04-01", "value1": 350, "value2": 340, "value3": 330,
+             "state": "ENNEN LÄÄKETTÄ", "time": "AAMU"},
+        ])
+
+        trend = self.pef_service.get_pef_trend()
+
+        day = date(2025, 4, 1).toordinal()
+        self.assertEqual(trend.window(day, day + 1, 100), [(day, 350), (day + 0.5, 320)])
+        self.assertIs(self.pef_service.get_pef_trend(), trend)
+
+    def test_get_pef_trend_no_user(self):
+        self.pef_service._user = None
+
+        self.assertEqual(len(self.pef_service.get_pef_trend()), 0)
+
+    def test_get_monitoring_page(self):
+        self.pef_service._user = User("MockUser", "pass")
+        self.mock_pef_monitoring_repository.find_monitoring_page.return_value = ["row"]
+
+        result = self.pef_service.get_monitoring_page(after=("2025-04-01", 7), page_size=10)
+
+        self.assertEqual(result, ["row"])
+        self.mock_pef_monitoring_repository.find_monitoring_page.assert_called_once_with(
+            "MockUser", after=("2025-04-01", 7), page_size=10)
+
+    def test_add_value_to_monitoring_duplicate(self):
+        self.mock_pef_monitoring_repository.add_value.return_value = None
+
+        with self.assertRaises(DuplicateMeasurementError):
+            self.pef_service.add_value_to_monitoring(
+                "2025-04-01", "test_user", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU")
+        self.assertEqual(
+            self.mock_pef_monitoring_repository.add_value.call_args[1], {"on_conflict": "ignore"})
+
+    def test_add_value_to_monitoring_replace(self):
+        self.mock_pef_monitoring_repository.add_value.return_value = 5
+
+        self.pef_service.add_value_to_monitoring(
+            "2025-04-01", "test_user", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU", replace=True)
+
+        self.assertEqual(
+            self.mock_pef_monitoring_repository.add_value.call_args[1], {"on_conflict": "replace"})
+
+    def test_sessions_are_read_from_cache_until_written(self):
+        self.mock_pef_monitoring_repository.get_sessions_by_username.return_value = ["session"]
+
+        self.pef_service.get_sessions_by_username("test_user")
+        sessions = self.pef_service.get_sessions_by_username("test_user")
+        self.pef_service.create_monitoring_session("test_user", "2025-04-01", "2025-04-10")
+        self.pef_service.get_sessions_by_username("test_user")
+
+        self.assertEqual(sessions, ["session"])
+        self.assertEqual(
+            self.mock_pef_monitoring_repository.get_sessions_by_username.call_count, 2)
+        self.assertEqual(self.pef_service.get_cache_stats(),
+                         {"hits": 1, "misses": 2, "size": 1})
+
+    def test_monitoring_cache_is_invalidated_by_add_value(self):
+        self.pef_service._user = User("test_user", "pass")
+        self.mock_pef_monitoring_repository.iter_monitoring_by_username.side_effect = \
+            lambda *args, **kwargs: iter(["row"])
+
+        self.pef_service.get_monitoring_by_username()
+        self.pef_service.get_monitoring_by_username()
+        self.pef_service.add_value_to_monitoring(
+            "2025-04-01", "test_user", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU")
+        self.pef_service.get_monitoring_by_username()
+
+        self.assertEqual(
+            self.mock_pef_monitoring_repository.iter_monitoring_by_username.call_count, 2)
+
+    def test_reference_pef_cache_is_invalidated_by_count_reference_pef(self):
+        self.pef_service._user = User("test_user", "pass")
+        self.mock_pef_repository.get_latest_for_user.return_value = []
+
+        self.pef_service.get_reference_pef_for_user()
+        self.pef_service.get_reference_pef_for_user()
+        self.pef_service.count_reference_pef(170, 30, "female")
+        self.pef_service.get_reference_pef_for_user()
+
+        self.assertEqual(self.mock_pef_repository.get_latest_for_user.call_count, 2)
+
+    def test_listeners_are_notified_of_changes(self):
+        listener = MagicMock()
+        self.pef_service.add_listener(listener)
+
+        pef_m = self.pef_service.add_value_to_monitoring(
+            "2025-04-01", "test_user", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU")
+        self.pef_service.create_monitoring_session("test_user", "2025-04-01", "2025-04-10")
+        self.pef_service.add_values_to_monitoring_bulk([])
+        self.pef_service.remove_listener(listener)
+        self.pef_service.create_monitoring_session("test_user", "2025-04-11", "2025-04-20")
+
+        self.assertEqual([call.args for call in listener.call_args_list], [
+            (MONITORING_ADDED, pef_m),
+            (SESSION_CREATED, {"username": "test_user", "start_date": "2025-04-01",
+                               "end_date": "2025-04-10"}),
+            (MONITORING_IMPORTED, None),
+        ])
+
+    def test_listeners_are_not_notified_of_duplicates(self):
+        listener = MagicMock()
+        self.pef_service.add_listener(listener)
+        self.mock_pef_monitoring_repository.add_value.return_value = None
+
+        with self.assertRaises(DuplicateMeasurementError):
+            self.pef_service.add_value_to_monitoring(
+                "2025-04-01", "test_user", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU")
+
+        listener.assert_not_called()
+
+    def test_get_finished_session_index(self):
+        self.mock_pef_monitoring_repository.get_sessions_by_username.return_value = [
+            {"start_date": "2025-04-01", "end_date": "2025-04-10"},
+            {"start_date": "2025-05-01", "end_date": "2025-05-10"},
+        ]
+
+        index = self.pef_service.get_finished_session_index("test_user")
+
+        self.assertTrue(index.contains("2025-04-10"))
+        self.assertFalse(index.contains("2025-04-20"))
+        self.assertTrue(index.contains("2025-05-01"))
+
+    def test_get_unfinished_monitoring(self):
+        self.mock_pef_monitoring_repository.find_unfinished_monitoring.return_value = ["row"]
+
+        self.pef_service.get_unfinished_monitoring("test_user")
+        rows = self.pef_service.get_unfinished_monitoring("test_user")
+
+        self.assertEqual(rows, ["row"])
+        self.mock_pef_monitoring_repository.find_unfinished_monitoring.assert_called_once_with(
+            "test_user")
+
+    def test_unfinished_monitoring_pages_are_invalidated_by_add_value(self):
+        repository = self.mock_pef_monitoring_repository
+        repository.find_unfinished_monitoring_page.return_value = ["row"]
+        repository.get_unfinished_monitoring_span.return_value = (1, "2025-04-01", "2025-04-01")
+
+        self.pef_service.get_unfinished_monitoring_page("test_user", page_size=10)
+        self.pef_service.get_unfinished_monitoring_span("test_user")
+        self.pef_service.add_value_to_monitoring(
+            "2025-04-02", "test_user", 300, 310, 305, "ENNEN LÄÄKETTÄ", "AAMU")
+        self.pef_service.get_unfinished_monitoring_page("test_user", page_size=10)
+        self.pef_service.get_unfinished_monitoring_span("test_user")
+
+        self.assertEqual(repository.find_unfinished_monitoring_page.call_count, 2)
+        repository.find_unfinished_monitoring_page.assert_called_with(
+            "test_user", after=None, page_size=10)
+        self.assertEqual(repository.get_unfinished_monitoring_span.call_count, 2)
@@ -0,0 +1,56 @@
+import unittest
+from services.read_cache import ReadCache
+
+
+class TestReadCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = ReadCache(max_size=2, ttl=10, clock=lambda: self.now)
+
+    def test_get_loads_once(self):
+        loads = []
+
+        first = self.cache.get(("Eva", "sessions"), lambda: loads.append(1) or ["row"])
+        second = self.cache.get(("Eva", "sessions"), lambda: loads.append(1) or ["other"])
+
+        self.assertEqual(first, ["row"])
+        self.assertIs(second, first)
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_entries_expire(self):
+        self.cache.get(("Eva", "sessions"), lambda: "old")
+        self.now = 10.0
+
+        self.assertEqual(self.cache.get(("Eva", "sessions"), lambda: "new"), "new")
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.get(("Eva", "sessions"), lambda: 1)
+        self.cache.get(("Eino", "sessions"), lambda: 2)
+        self.cache.get(("Eva", "sessions"), lambda: 1)
+        self.cache.get(("Eva", "monitoring"), lambda: 3)
+
+        self.assertEqual(self.cache.get(("Eva", "sessions"), lambda: None), 1)
+        self.assertEqual(self.cache.get(("Eino", "sessions"), lambda: "reloaded"), "reloaded")
+
+    def test_invalidate(self):
+        self.cache.get(("Eva", "sessions"), lambda: 1)
+        self.cache.get(("Eino", "sessions"), lambda: 2)
+
+        self.cache.invalidate("Eva")
+
+        self.assertEqual(self.cache.get(("Eva", "sessions"), lambda: "new"), "new")
+        self.assertEqual(self.cache.get(("Eino", "sessions"), lambda: "new"), 2)
+
+        self.cache.invalidate()
+
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_value_loaded_during_invalidation_is_not_stored(self):
+        def load():
+            self.cache.invalidate("Eva")
+            return "stale"
+
+        self.assertEqual(self.cache.get(("Eva", "sessions"), load), "stale")
+        self.assertEqual(self.cache.get(("Eva", "sessions"), lambda: "fresh"), "fresh")
@@ -0,0 +1,39 @@
+import random
+import unittest
+from datetime import date, timedelta
+from services.session_interval_index import SessionIntervalIndex
+
+
+def day(offset):
+    return (date(2025, 1, 1) + timedelta(days=offset)).isoformat()
+
+
+class TestSessionIntervalIndex(unittest.TestCase):
+    def test_contains(self):
+        index = SessionIntervalIndex([("2025-03-01", "2025-03-10"),
+                                      ("2025-01-01", "2025-01-31"),
+                                      ("2025-01-20", "2025-02-05")])
+
+        self.assertEqual(len(index), 2)
+        self.assertTrue(index.contains("2025-01-01"))
+        self.assertTrue(index.contains("2025-02-05"))
+        self.assertFalse(index.contains("2025-02-06"))
+        self.assertTrue(index.contains("2025-03-10"))
+        self.assertFalse(index.contains("2024-12-31"))
+        self.assertFalse(index.contains("2025-03-11"))
+
+    def test_add_matches_building_from_all_ranges(self):
+        rng = random.Random(20250404)
+        ranges = []
+        index = SessionIntervalIndex()
+        for _ in range(200):
+            start = rng.randint(0, 360)
+            ranges.append((day(start), day(start + rng.randint(0, 10))))
+            index.add(*ranges[-1])
+
+        expected = SessionIntervalIndex(ranges)
+
+        self.assertEqual(len(index), len(expected))
+        for offset in range(-5, 380):
+            self.assertEqual(index.contains(day(offset)),
+                             any(start <= day(offset) <= end for start, end in ranges))
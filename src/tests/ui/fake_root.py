@@ -0,0 +1,32 @@
+import time
+
+
+class FakeRoot:
+    """Stands in for the Tk root: callbacks given to after are run by run_until()."""
+
+    def __init__(self):
+        self._callbacks = {}
+        self._next_id = 0
+
+    def after(self, _milliseconds, callback):
+        self._next_id += 1
+        self._callbacks[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, callback_id):
+        self._callbacks.pop(callback_id, None)
+
+    def run_until(self, condition, timeout=2):
+        """Runs the scheduled callbacks like a main loop until condition() is true."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("The condition was not met before the timeout")
+            if self._callbacks:
+                callback_id = min(self._callbacks)
+                self._callbacks.pop(callback_id)()
+            time.sleep(0.001)
+
+    @property
+    def scheduled(self):
+        return len(self._callbacks)
@@ -0,0 +1,138 @@
+import threading
+import unittest
+from ui.task_executor import TaskExecutor
+from tests.ui.fake_root import FakeRoot
+
+
+class TestTaskExecutor(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.executor = TaskExecutor(self.root)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def _run_submitted_tasks(self):
+        """Runs the main loop until the tasks submitted so far have been handled."""
+        done = []
+        self.executor.submit(lambda: None, on_success=done.append)
+        self.root.run_until(lambda: done)
+
+    def test_success_is_delivered_on_main_thread(self):
+        results = []
+
+        self.executor.submit(
+            lambda a, b=0: a + b, 40, b=2,
+            on_success=lambda result: results.append((result, threading.current_thread())))
+        self.root.run_until(lambda: results)
+
+        self.assertEqual(results, [(42, threading.main_thread())])
+
+    def test_error_is_delivered_to_on_error(self):
+        errors = []
+
+        def fail():
+            raise ValueError("broken")
+
+        self.executor.submit(fail, on_success=self.fail, on_error=errors.append)
+        self.root.run_until(lambda: errors)
+
+        self.assertEqual([str(error) for error in errors], ["broken"])
+
+    def test_error_without_on_error_is_logged(self):
+        def fail():
+            raise ValueError("broken")
+
+        with self.assertLogs("ui.task_executor", level="ERROR"):
+            self.executor.submit(fail)
+            self._run_submitted_tasks()
+
+    def test_tasks_run_in_submission_order(self):
+        results = []
+
+        for number in range(5):
+            self.executor.submit(lambda number=number: number, on_success=results.append)
+        self._run_submitted_tasks()
+
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+
+    def test_cancelled_task_is_skipped(self):
+        release = threading.Event()
+        calls = []
+
+        self.executor.submit(release.wait)
+        task = self.executor.submit(lambda: calls.append("ran"), on_success=self.fail)
+        task.cancel()
+        release.set()
+        self._run_submitted_tasks()
+
+        self.assertTrue(task.cancelled)
+        self.assertEqual(calls, [])
+
+    def test_result_of_task_cancelled_while_running_is_discarded(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def work():
+            started.set()
+            release.wait()
+            return "result"
+
+        task = self.executor.submit(work, on_success=self.fail, on_error=self.fail)
+        started.wait()
+        self.executor.cancel_all()
+        release.set()
+        self._run_submitted_tasks()
+
+        self.assertTrue(task.cancelled)
+
+    def test_post_from_main_thread(self):
+        calls = []
+
+        self.executor.post(calls.append, "posted")
+        self.root.run_until(lambda: calls)
+
+        self.assertEqual(calls, ["posted"])
+
+    def test_post_from_other_thread_without_pending_tasks(self):
+        calls = []
+
+        thread = threading.Thread(
+            target=lambda: self.executor.post(
+                lambda: calls.append(threading.current_thread())))
+        thread.start()
+        thread.join()
+        self.root.run_until(lambda: calls)
+
+        self.assertEqual(calls, [threading.main_thread()])
+
+    def test_call_posted_by_task_comes_before_its_callback(self):
+        calls = []
+
+        def work():
+            self.executor.post(calls.append, "posted")
+            return "result"
+
+        self.executor.submit(work, on_success=calls.append)
+        self.root.run_until(lambda: len(calls) == 2)
+
+        self.assertEqual(calls, ["posted", "result"])
+
+    def test_shutdown_stops_worker_and_polling(self):
+        self.executor.shutdown()
+        self.executor._worker.join(timeout=2)
+
+        self.assertFalse(self.executor._worker.is_alive())
+        self.assertEqual(self.root.scheduled, 0)
+
+    def test_shutdown_from_callback_stops_polling(self):
+        done = []
+
+        def finish(result):
+            self.executor.shutdown()
+            done.append(result)
+
+        self.executor.submit(lambda: "result", on_success=finish)
+        self.root.run_until(lambda: done)
+
+        self.assertEqual(self.root.scheduled, 0)
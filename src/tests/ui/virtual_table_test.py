@@ -0,0 +1,109 @@
+import threading
+import unittest
+from unittest.mock import patch
+from ui.task_executor import TaskExecutor
+from ui.virtual_table import VirtualTable
+from tests.ui.fake_root import FakeRoot
+
+
+class FakeSource:
+    """Sorted rows served with keyset pagination, recording the queries."""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+        self.pages = []
+        self.counts = 0
+        self.threads = set()
+
+    def fetch_page(self, after, page_size):
+        self.threads.add(threading.current_thread())
+        self.pages.append(after)
+        keys = [key for key in self.keys if after is None or key > after]
+        return [{"key": key} for key in keys[:page_size]]
+
+    def count_rows(self):
+        self.threads.add(threading.current_thread())
+        self.counts += 1
+        return len(self.keys)
+
+
+class TestVirtualTable(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("ui.virtual_table.ttk")
+        ttk = patcher.start()
+        self.addCleanup(patcher.stop)
+        ttk.Treeview.return_value.insert.side_effect = lambda *args, **kwargs: object()
+
+        self.root = FakeRoot()
+        self.executor = TaskExecutor(self.root)
+        self.addCleanup(self.executor.shutdown)
+        self.source = FakeSource(range(0, 40, 2))
+        self.table = VirtualTable(
+            None, self.executor, columns={"key": "Key"},
+            fetch_page=self.source.fetch_page, count_rows=self.source.count_rows,
+            row_values=lambda row: (row["key"],), row_key=lambda row: row["key"],
+            height=3, page_size=5, cached_pages=4)
+
+    def _run_submitted_tasks(self):
+        """Runs the main loop until no task, including ones submitted by callbacks, is left."""
+        self.root.run_until(lambda: not self.executor._pending)
+
+    def _shown(self):
+        return [self.table.row(index)["key"] for index in sorted(self.table._items.values())]
+
+    def test_refresh_queries_on_worker_thread(self):
+        self.table.refresh()
+
+        self.assertEqual(self._shown(), [])
+        self._run_submitted_tasks()
+
+        self.assertEqual(self._shown(), [0, 2, 4])
+        self.assertEqual(self.table.row_count, 20)
+        self.assertNotIn(threading.main_thread(), self.source.threads)
+
+    def test_insert_after_view_keeps_visible_page(self):
+        self.table.refresh()
+        self._run_submitted_tasks()
+        self.source.pages.clear()
+
+        self.source.keys.append(31)
+        self.table.insert_row(31)
+        self._run_submitted_tasks()
+
+        self.assertEqual(self.table.row_count, 21)
+        self.assertEqual(self.source.counts, 1)
+        self.assertEqual(self.source.pages, [])
+        self.assertEqual(self._shown(), [0, 2, 4])
+
+    def test_insert_into_view_fetches_its_page(self):
+        self.table.refresh()
+        self._run_submitted_tasks()
+        self.source.pages.clear()
+
+        self.source.keys.insert(1, 1)
+        self.table.insert_row(1)
+        self._run_submitted_tasks()
+
+        self.assertEqual(self.source.counts, 1)
+        self.assertEqual(self.source.pages, [None])
+        self.assertEqual(self._shown(), [0, 1, 2])
+
+    def test_jump_fetches_pages_between_in_one_task(self):
+        self.table.refresh()
+        self._run_submitted_tasks()
+        self.source.pages.clear()
+
+        self.table.scroll(16)
+        self._run_submitted_tasks()
+
+        self.assertEqual(self.source.pages, [8, 18, 28])
+        self.assertEqual(self._shown(), [32, 34, 36])
+
+    def test_last_page_corrects_row_count(self):
+        self.table.refresh(row_count=25)
+        self.table.scroll(22)
+        self._run_submitted_tasks()
+
+        self.assertEqual(self.table.row_count, 20)
+        self.assertEqual(self._shown(), [34, 36, 38])
+        self.assertEqual(self.source.counts, 0)
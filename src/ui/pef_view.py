@@ -1,9 +1,38 @@
 from tkinter import ttk, StringVar, constants, END, messagebox, Text
 import tkinter as tk
-from tkcalendar import Calendar
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import math
 import textwrap
-from services.pef_service import pef_service
+import time
+from services.pef_service import (
+    pef_service, DuplicateMeasurementError,
+    MONITORING_ADDED, MONITORING_IMPORTED, SESSION_CREATED
+)
+from services.session_interval_index import SessionIntervalIndex
+from ui.task_executor import TaskExecutor
+from ui.trend_chart import TrendChart
+from ui.virtual_table import VirtualTable
+
+logger = logging.getLogger(__name__)
+
+# Calendar day colours by the number of measurements of the day:
+# (least measurements, calendar event tag, background colour)
+CALENDAR_LEVELS = (
+    (4, "measured_4", "#5cb85c"),
+    (2, "measured_2", "#a3d7a3"),
+    (1, "measured_1", "#dff0d8"),
+)
+
+
+@contextmanager
+def log_construction_time(name):
+    """Logs how long building the widgets of the with block took."""
+    started = time.perf_counter()
+    yield
+    logger.debug("Built %s in %.1f ms", name,
+                 (time.perf_counter() - started) * 1000)
 
 
 class PefListView:
@@ -17,9 +46,13 @@ class PefListView:
         self._handle_logout = handle_logout
         self._pef_service = pef_service
         self._user = user
+        self._task_executor = TaskExecutor(root)
+        self._session_report_task = None
 
         self._initialize_variables()
-        self._initialize()
+        with log_construction_time("the monitoring view"):
+            self._initialize()
+        self._pef_service.add_listener(self._on_service_event)
 
     def _initialize_variables(self):
         """Initialize StringVars and control variables."""
@@ -33,7 +66,6 @@ class PefListView:
         self._evening_after_var = StringVar()
         self._comparison_result_var = StringVar()
 
-        self._fields_initialized = False
         self._vcmd = self._root.register(self.validate_pef_input)
 
         self._calendar = None
@@ -43,7 +75,17 @@ class PefListView:
         self._pef_value_2_entry = None
         self._pef_value_3_entry = None
         self._toggle_button = None
+        # Sections are built when they are first shown
+        self._reference_section = None
+        self._comparison_frame = None
         self._pef_frame = None
+        self._pef_table = None
+        self._session_table = None
+        # Measurements inside these sessions are not shown in the PEF table
+        self._finished_sessions = SessionIntervalIndex()
+        # Measurement counts by day of the calendar months already marked,
+        # by (year, month). None while the counts are being fetched.
+        self._calendar_months = {}
 
     def pack(self):
         """Show the frame."""
@@ -53,6 +95,8 @@ class PefListView:
 
     def destroy(self):
         """Destroy the frame."""
+        self._pef_service.remove_listener(self._on_service_event)
+        self._task_executor.shutdown()
         self._frame.destroy()
 
     def validate_pef_input(self, new_value):
@@ -93,17 +137,16 @@ class PefListView:
 
         self._initialize_left_panel_buttons()
 
-        self._reference_section = ttk.Frame(self._center_panel)
-        self._comparison_frame = ttk.Frame(self._center_panel)
-        self._pef_frame = ttk.Frame(self._center_panel)
+    def _create_section(self, name, build):
+        """Create the frame of a section and build its widgets.
 
-        self._reference_section.grid(row=0, column=0, sticky="ew")
-        self._comparison_frame.grid(row=1, column=0, sticky="ew")
-        self._pef_frame.grid(row=2, column=0, sticky="ew")
-
-        self._reference_section.grid_remove()
-        self._comparison_frame.grid_remove()
-        self._pef_frame.grid_remove()
+        Args:
+            name: Name of the section for the timing log.
+            build: Called with the new frame. Stores the frame and builds
+                the widgets of the section in it.
+        """
+        with log_construction_time(name):
+            build(ttk.Frame(self._center_panel))
 
     def _initialize_greeting_label(self):
         """Create greeting label for user."""
@@ -157,6 +200,12 @@ class PefListView:
         self._show_instructions_button.grid(
             row=5, column=0, padx=10, pady=10, sticky="w")
 
+        self._show_trend_button = ttk.Button(
+            self._left_panel, text="Näytä PEF-trendi", command=self._open_trend_view
+        )
+        self._show_trend_button.grid(
+            row=6, column=0, padx=10, pady=10, sticky="w")
+
     def _initialize_reference_label(self):
         """Initialize label to show PEF reference value."""
         reference_label = ttk.Label(
@@ -185,29 +234,29 @@ class PefListView:
 
     def _toggle_reference_section(self):
         """Toggle visibility of the PEF reference input section."""
-        if self._reference_section.winfo_ismapped():
+        if self._reference_section is not None and self._reference_section.winfo_ismapped():
             self._reference_section.grid_remove()
             self._pef_reference_button.config(text="Laske PEF-viitearvo")
         else:
             self._hide_all_sections()
-            self._reference_section.grid()
-            self._initialize_fields()
+            if self._reference_section is None:
+                self._create_section("the reference section", self._initialize_fields)
+                self._reference_section.grid(row=0, column=0, sticky="ew")
+            else:
+                self._reference_section.grid()
             self._pef_reference_button.config(text="Sulje PEF-viitearvo")
 
         self._pef_reference_button.config(state=constants.NORMAL)
 
-    def _initialize_fields(self):
+    def _initialize_fields(self, frame):
         """Initialize dropdowns and entries for PEF reference calculation."""
-        if self._fields_initialized:
-            return
+        self._reference_section = frame
 
         self._initialize_age_dropdown()
         self._initialize_height_field()
         self._initialize_gender_checkboxes()
         self._initialize_calculate_button()
 
-        self._fields_initialized = True
-
     def _initialize_age_dropdown(self):
         """Initialize dropdown for selecting age."""
         self._age_label = ttk.Label(
@@ -293,19 +342,22 @@ class PefListView:
 
     def _toggle_comparison_fields(self):
         """Toggle visibility of PEF comparison fields."""
-        if self._comparison_frame.winfo_ismapped():
+        if self._comparison_frame is not None and self._comparison_frame.winfo_ismapped():
             self._comparison_frame.grid_remove()
             self._calculate_comparison_button.config(text="Laske vertailu")
         else:
             self._hide_all_sections()
-            self._comparison_frame.grid()
-            self._initialize_comparison_fields()
+            if self._comparison_frame is None:
+                self._create_section(
+                    "the comparison section", self._initialize_comparison_fields)
+                self._comparison_frame.grid(row=1, column=0, sticky="ew")
+            else:
+                self._comparison_frame.grid()
             self._calculate_comparison_button.config(text="Sulje vertailu")
 
-    def _initialize_comparison_fields(self):
+    def _initialize_comparison_fields(self, frame):
         """Initialize fields for comparing morning/evening PEF values."""
-        if hasattr(self, '_comparison_fields_initialized') and self._comparison_fields_initialized:
-            return
+        self._comparison_frame = frame
 
         labels_texts = [
             "Aamun PEF ennen lääkettä (L/min)",
@@ -337,8 +389,6 @@ class PefListView:
         self._comparison_result_label.grid(
             row=5, column=0, columnspan=2, pady=5)
 
-        self._comparison_fields_initialized = True
-
     def _calculate_comparison(self):
         """Calculate PEF differences and update results."""
         """Calculate PEF differences and update results."""
@@ -393,38 +443,47 @@ class PefListView:
 
     def _toggle_pef_section(self):
         """Toggle visibility of the PEF monitoring section."""
-        if self._pef_frame.winfo_ismapped():
+        if self._pef_frame is not None and self._pef_frame.winfo_ismapped():
             self._pef_frame.grid_forget()
             self._toggle_button.config(text="Pef-seuranta")
         else:
             self._hide_all_sections()
-            if not hasattr(self, '_pef_monitoring_section_created'):
-                self._create_pef_monitoring_section()
-                self._pef_monitoring_section_created = True
+            if self._pef_frame is None:
+                self._create_section(
+                    "the monitoring section", self._create_pef_monitoring_section)
 
             self._pef_frame.grid(row=1, column=0, padx=10,
                                  pady=10, sticky="ew")
             self._populate_pef_data_table()
             self._toggle_button.config(text="Piilota pef-seuranta")
 
-    def _create_pef_monitoring_section(self):
+    def _create_pef_monitoring_section(self, frame):
         """Create the PEF monitoring input section."""
+        # tkcalendar is only imported when the section is first opened
+        from tkcalendar import Calendar  # pylint: disable=import-outside-toplevel
+
+        self._pef_frame = frame
         vcmd_pef = self._root.register(self.validate_pef_input)
 
         self._date_label = ttk.Label(
             self._pef_frame, text="Valitse päivämäärä:")
         self._date_label.grid(row=0, column=0, padx=5, pady=5, sticky="w")
 
-        self._calendar = Calendar(
-            self._pef_frame,
-            selectmode='day',
-            date_pattern='yyyy-mm-dd',
-            font=("Helvetica", 9),
-            showweeknumbers=False,
-            firstweekday="monday"
-        )
+        with log_construction_time("the calendar"):
+            self._calendar = Calendar(
+                self._pef_frame,
+                selectmode='day',
+                date_pattern='yyyy-mm-dd',
+                font=("Helvetica", 9),
+                showweeknumbers=False,
+                firstweekday="monday"
+            )
         self._calendar.grid(row=0, column=1, padx=5, pady=5, sticky="w")
         self._calendar.selection_set(datetime.today().date())
+        for _least, tag, colour in CALENDAR_LEVELS:
+            self._calendar.tag_config(tag, background=colour, foreground="black")
+        self._calendar.bind("<<CalendarMonthChanged>>", self._mark_calendar_month)
+        self._mark_calendar_month()
 
         self._time_of_day_label = ttk.Label(
             self._pef_frame, text="Aika päivästä (AAMU/ILTA):")
@@ -477,19 +536,34 @@ class PefListView:
 
     def _save_and_close(self):
         """Save monitoring data and close the PEF section."""
-        if self._save_pef_data():
+        def close():
             self._pef_frame.grid_forget()
             self._toggle_button.config(text="Pef-seuranta")
-            self._populate_pef_data_table()
+
+        self._save_pef_data(close)
 
     def _save_and_continue(self):
         """Save monitoring data and clear fields for next input."""
-        if self._save_pef_data():
-            self._populate_pef_data_table()
+        def continue_input():
             self._clear_pef_inputs(keep_date=True)
 
-    def _save_pef_data(self):
-        """Save the entered PEF values to the service."""
+        self._save_pef_data(continue_input)
+
+    def _set_saving(self, saving):
+        """Disable the save buttons while a measurement is being saved."""
+        state = ["disabled"] if saving else ["!disabled"]
+        self._save_button.state(state)
+        self._save_continue_button.state(state)
+
+    def _save_pef_data(self, on_saved):
+        """Validate the entered PEF values and save them in the background.
+
+        Args:
+            on_saved: Called on the main thread once the values are stored.
+
+        Returns:
+            True if the values were valid and the save was started.
+        """
         date = self._calendar.get_date()
         username = self._logged_in_user.username
         value1 = self._pef_value_1_entry.get()
@@ -507,17 +581,6 @@ class PefListView:
             if not (10 <= val1 <= 999 and 10 <= val2 <= 999 and 10 <= val3 <= 999):
                 raise ValueError
 
-            date_str = str(date)  # Convert to string format 'YYYY-MM-DD'
-            existing = self._pef_service.get_monitoring_by_username()
-            for entry in existing:
-                if (entry['username'] == username and
-                        entry['date'] == date_str and
-                        entry['state'] == state and
-                        entry['time'] == time):
-                    messagebox.showerror(
-                        "Virhe", "Tälle päivälle on jo tehty seuranta näillä parametreillä.")
-                    return False
-
             if abs(val2 - val1) > 20 or abs(val3 - val2) > 20:
                 messagebox.showerror(
                     "Virhe", "Kahden peräkkäisen PEF-arvon ero ei saa ylittää 20 yksikköä.")
@@ -528,14 +591,29 @@ class PefListView:
                 "Virhe", "PEF-arvojen tulee olla numeroita välillä 10–999.")
             return False
 
-        self._pef_service.add_value_to_monitoring(
-            date, username, value1, value2, value3, state, time)
+        def saved(_pef_monitoring):
+            self._set_saving(False)
+            on_saved()
+
+        def failed(error):
+            self._set_saving(False)
+            if isinstance(error, DuplicateMeasurementError):
+                messagebox.showerror("Virhe", str(error))
+            else:
+                messagebox.showerror("Virhe", "Tallennus epäonnistui.")
+
+        self._set_saving(True)
+        self._task_executor.submit(
+            self._pef_service.add_value_to_monitoring,
+            date, username, value1, value2, value3, state, time,
+            on_success=saved, on_error=failed)
         return True
 
     def _clear_pef_inputs(self, keep_date=False):
         """Clear all input fields after save."""
         if not keep_date:
             self._calendar.selection_set(datetime.today().date())
+            self._mark_calendar_month()
 
         self._time_of_day_dropdown.set('')
         self._medication_dropdown.set('')
@@ -543,66 +621,97 @@ class PefListView:
         self._pef_value_2_entry.delete(0, END)
         self._pef_value_3_entry.delete(0, END)
 
+    def _mark_calendar_month(self, _event=None):
+        """Colour the days of the displayed month by their number of measurements.
+
+        The counts of a month are fetched once. Returning to a month that
+        has been marked already needs no query.
+        """
+        month, year = self._calendar.get_displayed_month()
+        if (year, month) in self._calendar_months:
+            return
+
+        self._calendar_months[(year, month)] = None
+        self._task_executor.submit(
+            self._pef_service.count_measurements_by_month,
+            self._logged_in_user.username, year, month,
+            on_success=lambda counts: self._show_calendar_counts(year, month, counts),
+            on_error=lambda _error: self._calendar_months.pop((year, month), None))
+
+    def _show_calendar_counts(self, year, month, counts):
+        """Add calendar events for the days of a month that have measurements."""
+        self._calendar_months[(year, month)] = counts
+        for day, count in counts.items():
+            event_date = datetime.strptime(day, "%Y-%m-%d").date()
+            tag = next(tag for least, tag, _colour in CALENDAR_LEVELS if count >= least)
+            self._calendar.calevent_remove(date=event_date)
+            text = "1 mittaus" if count == 1 else f"{count} mittausta"
+            self._calendar.calevent_create(event_date, text, tag)
+
     def _populate_pef_data_table(self):
         """Populate the PEF table with user's monitoring data."""
-        for row in self._pef_table.get_children():
-            self._pef_table.delete(row)
-
-        completed_sessions = self._pef_service.get_sessions_by_username(
-            self._logged_in_user.username)
-        completed_dates = set()
-
-        for session in completed_sessions:
-            try:
-                start = datetime.strptime(
-                    session["start_date"], "%Y-%m-%d").date()
-                end = datetime.strptime(session["end_date"], "%Y-%m-%d").date()
-                current = start
-                while current <= end:
-                    completed_dates.add(current)
-                    current += timedelta(days=1)
-            except Exception:
-                continue
-
-        data = self._pef_service.get_monitoring_by_username()
-        if not data:
-            return
+        def show(finished_sessions):
+            self._finished_sessions = finished_sessions
+            self._pef_table.refresh()
 
-        for entry in data:
-            try:
-                entry_date = datetime.strptime(entry[2], "%Y-%m-%d").date()
-            except Exception:
-                continue
+        self._task_executor.submit(
+            self._pef_service.get_finished_session_index, self._logged_in_user.username,
+            on_success=show)
 
-            if entry_date not in completed_dates:
-                self._pef_table.insert("", "end", values=(
-                    entry[2], entry[3], entry[4], entry[5], entry[6], entry[7]
-                ))
+    def _on_service_event(self, event, data):
+        """Forward a service notification to the main thread."""
+        self._task_executor.post(self._apply_service_event, event, data)
+
+    def _apply_service_event(self, event, data):
+        """Redraw the visible rows of the PEF table if the change affects them."""
+        if self._pef_table is None:
+            return
+
+        if event == MONITORING_IMPORTED:
+            self._populate_pef_data_table()
+            self._calendar.calevent_remove("all")
+            self._calendar_months.clear()
+            self._mark_calendar_month()
+        elif event == SESSION_CREATED:
+            if data["username"] == self._logged_in_user.username:
+                self._finished_sessions.add(data["start_date"], data["end_date"])
+                self._pef_table.refresh()
+        elif event == MONITORING_ADDED:
+            if data.username != self._logged_in_user.username:
+                return
+            date = str(data.date)
+            if not self._finished_sessions.contains(date):
+                # A new measurement gets the largest id, so it is the last
+                # row of its date and time
+                self._pef_table.insert_row((date, data.time, math.inf))
+            # The count of the day is fetched again with its month
+            month = (int(date[:4]), int(date[5:7]))
+            if month in self._calendar_months:
+                del self._calendar_months[month]
+                self._mark_calendar_month()
 
     def _create_pef_data_table(self):
         """Create the Treeview table for displaying monitoring data."""
         label = ttk.Label(self._pef_frame, text="Tallennetut PEF-arvot:")
         label.grid(row=8, column=0, columnspan=2, pady=(10, 0), sticky="w")
 
-        columns = ("date", "value1", "value2", "value3", "state", "time")
-        self._pef_table = ttk.Treeview(
-            self._pef_frame, columns=columns, show="headings", height=5)
-
-        scrollbar = ttk.Scrollbar(
-            self._pef_frame, orient="vertical", command=self._pef_table.yview)
-        self._pef_table.configure(yscrollcommand=scrollbar.set)
-
-        self._pef_table.grid(row=9, column=0, columnspan=2,
-                             sticky="nsew", pady=5)
-        scrollbar.grid(row=9, column=2, sticky="ns")
-
-        headings = {
-            "date": "Päivämäärä", "value1": "PEF 1", "value2": "PEF 2",
-            "value3": "PEF 3", "state": "Lääke", "time": "Aika päivästä"
-        }
-
-        for col, name in headings.items():
-            self._pef_table.heading(col, text=name)
+        username = self._logged_in_user.username
+        self._pef_table = VirtualTable(
+            self._pef_frame,
+            self._task_executor,
+            columns={
+                "date": "Päivämäärä", "value1": "PEF 1", "value2": "PEF 2",
+                "value3": "PEF 3", "state": "Lääke", "time": "Aika päivästä"
+            },
+            fetch_page=lambda after, page_size: self._pef_service.get_unfinished_monitoring_page(
+                username, after=after, page_size=page_size),
+            count_rows=lambda: self._pef_service.get_unfinished_monitoring_span(
+                username)["row_count"],
+            row_values=lambda row: (row["date"], row["value1"], row["value2"],
+                                    row["value3"], row["state"], row["time"]),
+            row_key=lambda row: (row["date"], row["time"], row["id"]),
+            height=5)
+        self._pef_table.grid(row=9, column=0, columnspan=3, sticky="nsew", pady=5)
 
         self._pef_table.column("date", anchor="center", width=90)
         self._pef_table.column("value1", anchor="center", width=80)
@@ -617,73 +726,138 @@ class PefListView:
 
     def lopeta_button_click(self):
         """Finalize the monitoring period and show results."""
-        table_data = self._pef_table.get_children()
-
-        if not table_data:
-            messagebox.showerror("Virhe", "Ei tallennettuja tietoja.")
-            return
-
-        start_date = self._pef_table.item(table_data[0])['values'][0]
-        end_date = self._pef_table.item(table_data[-1])['values'][0]
         username = self._logged_in_user.username
 
-        self._pef_service.create_monitoring_session(
-            username, start_date, end_date)
-        summary = self._pef_service.calculate_monitoring_difference_for_session(
-            username, start_date, end_date)
-        self._show_monitoring_results(summary)
+        def finish(span):
+            if not span["row_count"]:
+                self._lopeta_button.state(["!disabled"])
+                messagebox.showerror("Virhe", "Ei tallennettuja tietoja.")
+                return
+            self._task_executor.submit(
+                self._pef_service.finish_monitoring_session,
+                username, span["first_date"], span["last_date"],
+                on_success=finished, on_error=failed)
+
+        def finished(summary):
+            self._lopeta_button.state(["!disabled"])
+            self._show_monitoring_results(summary)
+
+        def failed(_error):
+            self._lopeta_button.state(["!disabled"])
+            messagebox.showerror("Virhe", "Seurannan lopetus epäonnistui.")
+
+        self._lopeta_button.state(["disabled"])
+        self._task_executor.submit(
+            self._pef_service.get_unfinished_monitoring_span, username,
+            on_success=finish, on_error=failed)
+
+    def _open_trend_view(self):
+        """Open a window with a chart of the user's PEF over time."""
+        window = tk.Toplevel(self._root)
+        window.title("PEF-trendi")
+
+        loading_label = ttk.Label(window, text="Ladataan mittauksia...")
+        loading_label.pack(padx=20, pady=20)
+
+        def load():
+            reference_pef = self._pef_service.get_reference_pef_for_user()
+            reference = reference_pef[-1].value if reference_pef else None
+            return self._pef_service.get_pef_trend(), reference
+
+        def show(result):
+            if not window.winfo_exists():
+                return
+            series, reference = result
+            loading_label.destroy()
+            if not series:
+                ttk.Label(window, text="Sinulla ei ole PEF-seurannan mittauksia.").pack(
+                    padx=20, pady=20)
+            else:
+                with log_construction_time("the trend chart"):
+                    chart = TrendChart(window, series, reference)
+                chart.pack(padx=10, pady=10)
+                ttk.Label(window, text=(
+                    "Vihreä: vähintään 80 % viitearvosta, keltainen: 60–80 %, "
+                    "punainen: alle 60 %.\nZoomaa hiiren rullalla, siirrä vetämällä "
+                    "ja palauta koko näkymä kaksoisnapsautuksella.")).pack(padx=10)
+            ttk.Button(window, text="Sulje", command=window.destroy).pack(pady=10)
+
+        self._task_executor.submit(
+            load, on_success=show,
+            on_error=lambda _error: messagebox.showerror(
+                "Virhe", "Mittausten lataus epäonnistui."))
 
     def _open_past_monitorings_view(self):
         """Open a window listing past monitoring sessions."""
-        self._past_sessions_window = tk.Toplevel(self._root)
-        self._past_sessions_window.title("Aiemmat seurannat")
-        self._past_sessions_window.geometry("400x300")
-
-        sessions = self._pef_service.get_sessions_by_username(
-            self._logged_in_user.username)
-
-        if not sessions:
-            label = ttk.Label(self._past_sessions_window,
-                              text="Sinulla ei ole aiempia seurantoja.")
-            label.pack(padx=10, pady=20)
-            ttk.Button(self._past_sessions_window, text="Sulje",
-                       command=self._past_sessions_window.destroy).pack(pady=10)
-            return
+        window = tk.Toplevel(self._root)
+        window.title("Aiemmat seurannat")
+        window.geometry("400x300")
+        self._past_sessions_window = window
 
-        self._session_listbox = ttk.Treeview(
-            self._past_sessions_window, columns=("start_date", "end_date"), show="headings"
-        )
-        self._session_listbox.heading("start_date", text="Alkupäivä")
-        self._session_listbox.heading("end_date", text="Loppupäivä")
-        self._session_listbox.pack(padx=10, pady=10, fill="both", expand=True)
+        username = self._logged_in_user.username
+
+        loading_label = ttk.Label(window, text="Ladataan seurantoja...")
+        loading_label.pack(padx=10, pady=20)
 
-        for session in sessions:
-            self._session_listbox.insert("", "end", values=(
-                session["start_date"], session["end_date"]))
+        def show(session_count):
+            if not window.winfo_exists():
+                return
+            loading_label.destroy()
 
-        view_button = ttk.Button(
-            self._past_sessions_window, text="Näytä seurantaraportti", command=self._view_selected_session)
-        view_button.pack(pady=5)
+            if not session_count:
+                label = ttk.Label(window, text="Sinulla ei ole aiempia seurantoja.")
+                label.pack(padx=10, pady=20)
+                ttk.Button(window, text="Sulje", command=window.destroy).pack(pady=10)
+                return
 
-        close_button = ttk.Button(
-            self._past_sessions_window, text="Sulje", command=self._past_sessions_window.destroy)
-        close_button.pack(pady=5)
+            self._session_table = VirtualTable(
+                window,
+                self._task_executor,
+                columns={"start_date": "Alkupäivä", "end_date": "Loppupäivä"},
+                fetch_page=lambda after, page_size: self._pef_service.get_sessions_page(
+                    username, after=after, page_size=page_size),
+                count_rows=lambda: self._pef_service.count_sessions(username),
+                row_values=lambda row: (row["start_date"], row["end_date"]),
+                row_key=lambda row: (row["start_date"], row["id"]),
+                height=8)
+            self._session_table.pack(padx=10, pady=10, fill="both", expand=True)
+            self._session_table.refresh(row_count=session_count)
+
+            view_button = ttk.Button(
+                window, text="Näytä seurantaraportti", command=self._view_selected_session)
+            view_button.pack(pady=5)
+
+            close_button = ttk.Button(window, text="Sulje", command=window.destroy)
+            close_button.pack(pady=5)
+
+        self._task_executor.submit(
+            self._pef_service.count_sessions, username, on_success=show,
+            on_error=lambda _error: messagebox.showerror(
+                "Virhe", "Seurantojen lataus epäonnistui."))
 
     def _view_selected_session(self):
         """Show monitoring summary for selected session."""
-        selected_item = self._session_listbox.selection()
+        session = self._session_table.selected_row()
 
-        if not selected_item:
+        if session is None:
             messagebox.showerror("Virhe", "Valitse seuranta ensin.")
             return
 
-        selected_values = self._session_listbox.item(selected_item)['values']
-        start_date, end_date = selected_values
+        start_date = session["start_date"]
+        end_date = session["end_date"]
         username = self._logged_in_user.username
 
-        summary = self._pef_service.calculate_monitoring_difference_for_session(
-            username, start_date, end_date)
-
+        # Only the report of the latest selection is shown
+        if self._session_report_task is not None:
+            self._session_report_task.cancel()
+        self._session_report_task = self._task_executor.submit(
+            self._pef_service.get_session_summary, username, start_date, end_date,
+            on_success=self._show_session_report,
+            on_error=lambda _error: messagebox.showerror(
+                "Virhe", "Seurantaraportin lataus epäonnistui."))
+
+    def _show_session_report(self, summary):
+        """Show the monitoring summary of a past session."""
         if not isinstance(summary, dict):
             messagebox.showerror(
                 "Virhe", "Seurantaraportin lataus epäonnistui.")
@@ -740,8 +914,6 @@ class PefListView:
     def _clear_current_session_data(self):
         """Reset form after finishing a monitoring session."""
         self._clear_pef_inputs()
-        for row in self._pef_table.get_children():
-            self._pef_table.delete(row)
 
     def _show_instructions_popup(self):
         """Show app instructions in a popup."""
@@ -769,9 +941,9 @@ class PefListView:
         ttk.Button(popup, text="Sulje", command=popup.destroy).pack(pady=10)
 
     def _hide_all_sections(self):
-        self._reference_section.grid_remove()
-        self._comparison_frame.grid_remove()
-        self._pef_frame.grid_remove()
+        for section in (self._reference_section, self._comparison_frame, self._pef_frame):
+            if section is not None:
+                section.grid_remove()
 
         # Reset button labels
         self._pef_reference_button.config(text="Laske PEF-viitearvo")
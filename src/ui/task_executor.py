@@ -0,0 +1,140 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    """A function call submitted to a TaskExecutor."""
+
+    def __init__(self, function, args, kwargs, on_success, on_error):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancels the task.
+
+        A task that has not started yet is skipped. The result of a running
+        task is discarded, so neither callback is called.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """True if the task has been cancelled."""
+        return self._cancelled.is_set()
+
+
+class TaskExecutor:
+    """Runs service calls on a worker thread so that the Tk main loop stays responsive.
+
+    Tasks run one at a time in submission order. Their results are passed
+    back to the main loop, which polls for them with root.after until the
+    executor is shut down, and the callbacks run on the main thread. Tk may
+    only be called from the main thread, so polling is the way calls posted
+    from other threads get delivered.
+    """
+
+    def __init__(self, root, poll_interval=50):
+        """Starts the worker thread and the polling. Must be called from the main thread.
+
+        Args:
+            root: The Tk root window.
+            poll_interval: Milliseconds between checks for finished tasks.
+        """
+        self._root = root
+        self._poll_interval = poll_interval
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._pending = []
+        self._running = True
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+        self._poll_id = self._root.after(self._poll_interval, self._poll)
+
+    def submit(self, function, *args, on_success=None, on_error=None, **kwargs):
+        """Runs function(*args, **kwargs) on the worker thread.
+
+        Must be called from the main thread.
+
+        Args:
+            function: The function to run.
+            on_success: Called on the main thread with the return value.
+            on_error: Called on the main thread with the raised exception.
+
+        Returns:
+            The Task, which can be cancelled.
+        """
+        task = Task(function, args, kwargs, on_success, on_error)
+        self._pending.append(task)
+        self._tasks.put(task)
+        return task
+
+    def post(self, function, *args):
+        """Calls function(*args) on the main thread.
+
+        Can be called from any thread, e.g. by a service notification sent
+        from a task. The call is made on the next poll, and a call posted by
+        a task is made before the callbacks of the task.
+        """
+        self._results.put((None, (function, args), None))
+
+    def cancel_all(self):
+        """Cancels every pending task."""
+        for task in self._pending:
+            task.cancel()
+
+    def shutdown(self):
+        """Cancels the pending tasks and stops the worker thread."""
+        self.cancel_all()
+        self._tasks.put(None)
+        self._running = False
+        if self._poll_id is not None:
+            self._root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            if task.cancelled:
+                self._results.put((task, None, None))
+                continue
+            try:
+                result = task.function(*task.args, **task.kwargs)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                self._results.put((task, None, error))
+            else:
+                self._results.put((task, result, None))
+
+    def _poll(self):
+        self._poll_id = None
+        while self._running:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                function, args = result
+                function(*args)
+                continue
+            self._pending.remove(task)
+            if task.cancelled:
+                continue
+            if error is not None:
+                if task.on_error is None:
+                    logger.error("Background task failed", exc_info=error)
+                else:
+                    task.on_error(error)
+            elif task.on_success is not None:
+                task.on_success(result)
+
+        # A callback may have shut the executor down
+        if self._running:
+            self._poll_id = self._root.after(self._poll_interval, self._poll)
@@ -0,0 +1,186 @@
+import datetime
+import logging
+import time
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+# Drawing slower than this is logged, about one frame at 60 Hz
+FRAME_BUDGET_MS = 16
+
+# Zones relative to the reference PEF: (lower limit, upper limit, colour)
+REFERENCE_BANDS = (
+    (0.8, None, "#dff0d8"),
+    (0.6, 0.8, "#fcf8e3"),
+    (0, 0.6, "#f2dede"),
+)
+
+MARGIN_LEFT = 50
+MARGIN_RIGHT = 10
+MARGIN_TOP = 10
+MARGIN_BOTTOM = 30
+X_LABEL_COUNT = 5
+MIN_SPAN_DAYS = 3
+
+
+class TrendChart:
+    """Line chart of PEF over time on a Tk Canvas.
+
+    The reference bands and the y axis are drawn once. Zooming and panning
+    only change the visible date range: the line is downsampled to the plot
+    width from a DownsampledSeries and its coordinates are replaced, and the
+    date labels are drawn again. Redraws requested by mouse events are
+    combined so that at most one is made per idle moment.
+    """
+
+    def __init__(self, master, series, reference=None, width=640, height=280):
+        """Creates the chart and draws the whole series.
+
+        Args:
+            master: The parent widget.
+            series: DownsampledSeries of (day number, PEF) points, not empty.
+            reference: Reference PEF of the user, or None.
+            width: Width of the canvas in pixels.
+            height: Height of the canvas in pixels.
+        """
+        self._series = series
+        self._reference = reference
+        self._width = width
+        self._height = height
+        self._plot_width = width - MARGIN_LEFT - MARGIN_RIGHT
+        self._plot_height = height - MARGIN_TOP - MARGIN_BOTTOM
+
+        first_day, last_day, lowest, highest = series.bounds()
+        self._first_day = first_day
+        self._last_day = max(last_day, first_day + MIN_SPAN_DAYS)
+        self._view = (self._first_day, self._last_day)
+        if reference is not None:
+            lowest = min(lowest, reference * 0.5)
+            highest = max(highest, reference * 1.1)
+        padding = max((highest - lowest) * 0.05, 10)
+        self._lowest = lowest - padding
+        self._highest = highest + padding
+
+        self._render_id = None
+        self._drag_x = None
+
+        self._canvas = tk.Canvas(
+            master, width=width, height=height, background="white", highlightthickness=0)
+        self._draw_static()
+
+        self._canvas.bind("<MouseWheel>", self._on_mouse_wheel)
+        self._canvas.bind("<Button-4>", lambda event: self._zoom(event.x, 0.8))
+        self._canvas.bind("<Button-5>", lambda event: self._zoom(event.x, 1.25))
+        self._canvas.bind("<ButtonPress-1>", self._on_press)
+        self._canvas.bind("<B1-Motion>", self._on_drag)
+        self._canvas.bind("<Double-Button-1>", lambda _event: self.reset_zoom())
+
+        self._render()
+
+    def pack(self, **options):
+        """Places the chart with the pack geometry manager."""
+        self._canvas.pack(**options)
+
+    def reset_zoom(self):
+        """Shows the whole series again."""
+        self._set_view(self._first_day, self._last_day)
+
+    def _y(self, value):
+        share = (value - self._lowest) / (self._highest - self._lowest)
+        return MARGIN_TOP + self._plot_height * (1 - share)
+
+    def _x(self, day):
+        start, end = self._view
+        return MARGIN_LEFT + self._plot_width * (day - start) / (end - start)
+
+    def _day(self, x):
+        start, end = self._view
+        return start + (end - start) * (x - MARGIN_LEFT) / self._plot_width
+
+    def _draw_static(self):
+        left = MARGIN_LEFT
+        right = self._width - MARGIN_RIGHT
+        top = MARGIN_TOP
+        bottom = self._height - MARGIN_BOTTOM
+
+        if self._reference is not None:
+            for lower, upper, colour in REFERENCE_BANDS:
+                upper_y = top if upper is None else max(self._y(self._reference * upper), top)
+                lower_y = min(self._y(self._reference * lower), bottom)
+                if upper_y < lower_y:
+                    self._canvas.create_rectangle(
+                        left, upper_y, right, lower_y, fill=colour, outline="")
+            self._canvas.create_line(
+                left, self._y(self._reference), right, self._y(self._reference),
+                fill="#3c763d", dash=(4, 2))
+
+        self._line = self._canvas.create_line(0, 0, 0, 0, fill="#1f5f99", width=1.5)
+
+        # The line continues to the nearest points outside the view, so the
+        # margins are covered after it
+        self._canvas.create_rectangle(
+            0, 0, left, self._height, fill="white", outline="")
+        self._canvas.create_rectangle(
+            right, 0, self._width, self._height, fill="white", outline="")
+        self._canvas.create_rectangle(left, top, right, bottom, outline="#999999")
+
+        for step in range(5):
+            value = self._lowest + (self._highest - self._lowest) * step / 4
+            self._canvas.create_text(
+                left - 5, self._y(value), text=f"{value:.0f}", anchor="e",
+                font=("Helvetica", 8))
+
+    def _render(self):
+        self._render_id = None
+        started = time.perf_counter()
+
+        start, end = self._view
+        points = self._series.window(start, end, self._plot_width)
+        if len(points) > 1:
+            coordinates = []
+            for day, value in points:
+                coordinates.append(self._x(day))
+                coordinates.append(self._y(value))
+            self._canvas.coords(self._line, *coordinates)
+            self._canvas.itemconfigure(self._line, state="normal")
+        else:
+            self._canvas.itemconfigure(self._line, state="hidden")
+
+        self._canvas.delete("x_label")
+        for step in range(X_LABEL_COUNT):
+            day = start + (end - start) * step / (X_LABEL_COUNT - 1)
+            label_date = datetime.date.fromordinal(int(day))
+            self._canvas.create_text(
+                self._x(day), self._height - MARGIN_BOTTOM + 12,
+                text=f"{label_date.day}.{label_date.month}.{label_date.year}",
+                font=("Helvetica", 8), tags="x_label")
+
+        elapsed = (time.perf_counter() - started) * 1000
+        if elapsed > FRAME_BUDGET_MS:
+            logger.debug("Drawing %d trend points took %.1f ms", len(points), elapsed)
+
+    def _set_view(self, start, end):
+        span = min(max(end - start, MIN_SPAN_DAYS), self._last_day - self._first_day)
+        start = min(max(start, self._first_day), self._last_day - span)
+        self._view = (start, start + span)
+        if self._render_id is None:
+            self._render_id = self._canvas.after_idle(self._render)
+
+    def _zoom(self, x, factor):
+        start, end = self._view
+        center = self._day(min(max(x, MARGIN_LEFT), MARGIN_LEFT + self._plot_width))
+        self._set_view(center - (center - start) * factor, center + (end - center) * factor)
+
+    def _on_mouse_wheel(self, event):
+        self._zoom(event.x, 0.8 if event.delta > 0 else 1.25)
+
+    def _on_press(self, event):
+        self._drag_x = event.x
+
+    def _on_drag(self, event):
+        if self._drag_x is None:
+            return
+        start, end = self._view
+        shift = (self._drag_x - event.x) * (end - start) / self._plot_width
+        self._drag_x = event.x
+        self._set_view(start + shift, end + shift)
@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from tkinter import ttk
+from services.pef_service import PAGE_SIZE
+
+
+class VirtualTable:
+    """Table for long lists that only holds the rows in view.
+
+    Rows are fetched a page at a time with keyset pagination: a page starts
+    after the last row of the previous page. Only the rows that fit in the
+    view are items of the Treeview, and only a few recently used pages are
+    kept in memory, so memory use and redraw time do not grow with the
+    number of rows. Rows are counted and fetched on the worker thread of a
+    TaskExecutor, and the view is drawn again when they arrive.
+    """
+
+    def __init__(self, master, task_executor, columns, fetch_page, count_rows, row_values,
+                 row_key, height=10, page_size=PAGE_SIZE, cached_pages=4):
+        """Creates the table. Rows are loaded by refresh().
+
+        Args:
+            master: The parent widget.
+            task_executor: TaskExecutor running the queries.
+            columns: Dictionary of column names and headings.
+            fetch_page: fetch_page(after, page_size) returns the rows that
+                follow the row with key after, or the first rows if after is None.
+            count_rows: Returns the total number of rows.
+            row_values: Returns the values shown for a row.
+            row_key: Returns the pagination key of a row.
+            height: Number of visible rows.
+            page_size: Number of rows fetched at a time.
+            cached_pages: Number of pages kept in memory.
+        """
+        self._task_executor = task_executor
+        self._fetch_page = fetch_page
+        self._count_rows = count_rows
+        self._row_values = row_values
+        self._row_key = row_key
+        self._height = height
+        self._page_size = page_size
+        self._cached_pages = cached_pages
+
+        self._pages = OrderedDict()
+        self._page_keys = {0: None}
+        self._loading = {}
+        self._count_task = None
+        self._row_count = 0
+        self._offset = 0
+        self._items = {}
+        self._selected_index = None
+
+        self._frame = ttk.Frame(master)
+        self._frame.grid_rowconfigure(0, weight=1)
+        self._frame.grid_columnconfigure(0, weight=1)
+        self._tree = ttk.Treeview(
+            self._frame, columns=tuple(columns), show="headings", height=height)
+        for name, heading in columns.items():
+            self._tree.heading(name, text=heading)
+        self._scrollbar = ttk.Scrollbar(
+            self._frame, orient="vertical", command=self._on_scrollbar)
+        self._tree.grid(row=0, column=0, sticky="nsew")
+        self._scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self._tree.bind("<<TreeviewSelect>>", self._on_select)
+        self._tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self._tree.bind("<Button-4>", lambda _event: self.scroll(-3))
+        self._tree.bind("<Button-5>", lambda _event: self.scroll(3))
+
+    def grid(self, **options):
+        """Places the table with the grid geometry manager."""
+        self._frame.grid(**options)
+
+    def pack(self, **options):
+        """Places the table with the pack geometry manager."""
+        self._frame.pack(**options)
+
+    def column(self, name, **options):
+        """Configures a column of the Treeview."""
+        self._tree.column(name, **options)
+
+    @property
+    def row_count(self):
+        """Total number of rows."""
+        return self._row_count
+
+    def refresh(self, row_count=None):
+        """Loads the rows again, e.g. after the data has changed.
+
+        Args:
+            row_count: The number of rows if it is already known. Otherwise
+                the rows are counted in the background.
+        """
+        self._forget_pages(0)
+        if self._count_task is not None:
+            self._count_task.cancel()
+            self._count_task = None
+        if row_count is not None:
+            self._set_row_count(row_count)
+        else:
+            self._count_task = self._task_executor.submit(
+                self._count_rows, on_success=self._set_row_count)
+
+    def insert_row(self, key):
+        """Adds a row that was stored with a pagination key.
+
+        The row is counted without counting all rows again, and only the
+        pages from the one the row belongs to are fetched again.
+        """
+        self._row_count += 1
+        selected = self.selected_row()
+        if selected is not None and key < self._row_key(selected):
+            self._selected_index += 1
+        first_changed = max(
+            number for number, after in self._page_keys.items()
+            if after is None or after < key)
+        self._forget_pages(first_changed)
+        self._render()
+
+    def scroll(self, rows):
+        """Scrolls the view by a number of rows."""
+        offset = max(0, min(self._offset + rows, self._row_count - self._height))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def row(self, index):
+        """Returns the row at an index, or None if its page is not loaded."""
+        page_number, position = divmod(index, self._page_size)
+        rows = self._pages.get(page_number)
+        if rows is None or position >= len(rows):
+            return None
+        return rows[position]
+
+    def selected_row(self):
+        """Returns the selected row or None."""
+        if self._selected_index is None:
+            return None
+        return self.row(self._selected_index)
+
+    def _set_row_count(self, row_count):
+        self._count_task = None
+        self._row_count = row_count
+        self._offset = max(0, min(self._offset, self._row_count - self._height))
+        if self._selected_index is not None and self._selected_index >= self._row_count:
+            self._selected_index = None
+        self._render()
+
+    def _forget_pages(self, first):
+        """Drops the pages from first on, whose rows may have changed."""
+        for number in [number for number in self._pages if number >= first]:
+            del self._pages[number]
+        for number in [number for number in self._page_keys if number > first]:
+            del self._page_keys[number]
+        # A page being fetched may already be out of date
+        for task in set(self._loading.values()):
+            task.cancel()
+        self._loading.clear()
+
+    def _get_page(self, number):
+        """Returns a page if it is loaded, and otherwise starts fetching it.
+
+        Returns:
+            The rows of the page, or None if they are being fetched.
+        """
+        if number in self._pages:
+            self._pages.move_to_end(number)
+            return self._pages[number]
+
+        # A page can only be fetched once the last row of the previous page is
+        # known, so a jump far ahead fetches the pages in between in the same task
+        first = max(known for known in self._page_keys if known <= number)
+        if first in self._pages:
+            # The rows ended before the page
+            return []
+        if first not in self._loading:
+            task = self._task_executor.submit(
+                self._fetch_pages, self._page_keys[first], number - first + 1,
+                on_success=lambda pages: self._add_pages(first, pages, task))
+            for loading in range(first, number + 1):
+                self._loading[loading] = task
+        return None
+
+    def _fetch_pages(self, after, count):
+        """Fetches count pages following a key. Runs on the worker thread."""
+        pages = []
+        for _ in range(count):
+            rows = self._fetch_page(after, self._page_size)
+            pages.append(rows)
+            if len(rows) < self._page_size:
+                break
+            after = self._row_key(rows[-1])
+        return pages
+
+    def _add_pages(self, first, pages, task):
+        for number, rows in enumerate(pages, first):
+            self._pages[number] = rows
+            self._pages.move_to_end(number)
+            if rows:
+                self._page_keys[number + 1] = self._row_key(rows[-1])
+            if len(rows) < self._page_size:
+                # The last page tells the exact number of rows
+                self._row_count = number * self._page_size + len(rows)
+                self._offset = max(0, min(self._offset, self._row_count - self._height))
+        for number in [number for number, loading in self._loading.items() if loading is task]:
+            del self._loading[number]
+        while len(self._pages) > self._cached_pages:
+            self._pages.popitem(last=False)
+        self._render()
+
+    def _render(self):
+        # The rows shown stay in place until every visible row is loaded
+        end = min(self._row_count, self._offset + self._height)
+        rows = []
+        for index in range(self._offset, end):
+            page_number, position = divmod(index, self._page_size)
+            page = self._get_page(page_number)
+            if page is None:
+                return
+            if position >= len(page):
+                break
+            rows.append(page[position])
+
+        self._tree.delete(*self._tree.get_children())
+        self._items = {}
+        for index, row in enumerate(rows, self._offset):
+            item = self._tree.insert("", "end", values=self._row_values(row))
+            self._items[item] = index
+            if index == self._selected_index:
+                self._tree.selection_set(item)
+
+        if self._row_count:
+            self._scrollbar.set(self._offset / self._row_count, end / self._row_count)
+        else:
+            self._scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll(round(float(args[0]) * self._row_count) - self._offset)
+        elif action == "scroll":
+            amount = int(args[0])
+            self.scroll(amount * self._height if args[1] == "pages" else amount)
+
+    def _on_mouse_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_select(self, _event):
+        selection = self._tree.selection()
+        if selection and selection[0] in self._items:
+            self._selected_index = self._items[selection[0]]
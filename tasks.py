@@ -5,10 +5,22 @@ from invoke import task
 def build(ctx):
     ctx.run("python3 src/build.py", pty=True)
 
+@task
+def reset_database(ctx):
+    ctx.run("python3 src/initialize_database.py --reset", pty=True)
+
+@task
+def migrate_pefs(ctx):
+    ctx.run("python3 src/migrate_pef_file.py", pty=True)
+
 @task
 def start(ctx):
     ctx.run("python3 src/index.py", pty=True)
 
+@task
+def importtime(ctx):
+    ctx.run("cd src && python3 -X importtime -c 'import index'", pty=True)
+
 @task
 def format(ctx):
     ctx.run("autopep8 --in-place --recursive src", pty=True)
@@ -27,6 +39,13 @@ def coverage(ctx):
 def coverage_report(ctx):
     ctx.run("coverage html", pty=True)
 
+@task
+def benchmark(ctx):
+    ctx.run("PYTHONPATH=src python3 src/benchmarks/pef_repository_benchmark.py", pty=True)
+    ctx.run("PYTHONPATH=src python3 src/benchmarks/monitoring_index_benchmark.py", pty=True)
+    ctx.run("PYTHONPATH=src python3 src/benchmarks/connection_profile_benchmark.py", pty=True)
+    ctx.run("PYTHONPATH=src python3 src/benchmarks/monitoring_engine_benchmark.py", pty=True)
+
 @task
 def lint(ctx):
     ctx.run("PYTHONPATH=src pylint src", pty=True)
\ No newline at end of file